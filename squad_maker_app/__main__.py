@@ -0,0 +1,7 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Runs the squad maker command line tool. See ``squad_maker_app.cli``. """
+
+from squad_maker_app.cli import main
+
+main()
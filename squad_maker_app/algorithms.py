@@ -6,13 +6,22 @@ Functions:
     make_random_squads: builds squads by choosing players at random (used only as a baseline)
     make_squads_minimize_cumulative_delta_mean: builds squads by attempting to minimize the cumulative delta
         mean of each squad.
+    make_squads_snake_draft: quickly builds squads by drafting players in order of total rating.
+
+Classes:
+    DeadlineExceeded: raised when an algorithm is abandoned because it won't finish before its deadline.
 """
 
+import time
 from math import floor
 from random import shuffle
 from squad_maker_app.models import Squad
 
 
+class DeadlineExceeded(Exception):
+    """ Raised when an algorithm is abandoned because it won't finish before its deadline. """
+
+
 def make_random_squads(num_squads, players):
     """
     Makes squads by choosing players at random, without regard for their individual skill ratings.
@@ -67,7 +76,7 @@ def get_players_per_squad(num_squads, players):
     return floor(len(players) / num_squads)
 
 
-def make_squads_minimize_cumulative_delta_mean(num_squads, players):
+def make_squads_minimize_cumulative_delta_mean(num_squads, players, deadline=None):
     """ Makes closely matched squads from the given set of players.
 
     Algorithm steps:
@@ -85,13 +94,21 @@ def make_squads_minimize_cumulative_delta_mean(num_squads, players):
            player and add it to the squad. The best fit player is the player who results in the lowest cumulative
            delta mean for the squad.
 
+    Step 7 is O(n^2) in the number of players. If a ``deadline`` is given the time taken so far by step 7 is used to
+    predict when the algorithm will finish after each pick, and the algorithm is abandoned as soon as it is
+    predicted to miss the deadline, or if the deadline has passed before step 7 starts.
+
     Args:
         num_squads (int): The number of squads to make.
         players (list): The available players.
+        deadline (float): Optional ``time.monotonic()`` value by which the squads must be made.
 
     Returns:
         list(``Squad``), list(``Player``): A (squads, waiting_list) tuple.
 
+    Raises:
+        DeadlineExceeded: If the squads won't be made before ``deadline``.
+
     """
     _validate_arguments(num_squads, players)
     waiting_list = []
@@ -114,12 +131,84 @@ def make_squads_minimize_cumulative_delta_mean(num_squads, players):
 
     # initialize the required number of squads, each with one of the outlier players
     squads = [DeltaMeanSquadDecorator([players.pop(0)]) for _ in range(num_squads)]
+    if deadline is not None:
+        _check_deadline(deadline, 0)
+        total_work = _get_total_work(num_squads, len(players), 1)
+    start = time.monotonic()
+    work_done = 0
     while len(players) > 0:
+        # when there are many squads a single round is most of the work, so the deadline is checked after each pick
         for squad in squads:
+            work_done += _get_pick_work(len(players), len(squad.players))
             _append_best_fit_for_squad(squad, players)
+            if deadline is not None and len(players) > 0:
+                seconds_per_work = (time.monotonic() - start) / work_done
+                _check_deadline(deadline, seconds_per_work * (total_work - work_done))
+    return squads, waiting_list
+
+
+def make_squads_snake_draft(num_squads, players):
+    """ Quickly makes squads from the given set of players in O(n log n) time.
+
+    Squads are not as closely matched as the squads made by ``make_squads_minimize_cumulative_delta_mean``, but this
+    algorithm is a reasonable fallback when a roster is too large to make squads with the slower algorithm.
+
+    Algorithm steps:
+        1. If applicable, place the players with the largest cumulative delta mean on the waiting list.
+        2. Sort the remaining players in order of descending total rating.
+        3. Draft the players into the squads in snake order. Squads 1 to N each pick a player, then squads N to 1
+           each pick a player, and so on.
+
+    Args:
+        num_squads (int): The number of squads to make.
+        players (list): The available players.
+
+    Returns:
+        list(``Squad``), list(``Player``): A (squads, waiting_list) tuple.
+
+    """
+    _validate_arguments(num_squads, players)
+    players = _decorate_players_with_delta_mean_data(players)
+    players.sort(key=lambda p: p.cumulative_delta_mean, reverse=True)
+
+    players_on_wait_list = len(players) - get_players_per_squad(num_squads, players)*num_squads
+    waiting_list = players[:players_on_wait_list]
+    players = players[players_on_wait_list:]
+    players.sort(key=lambda p: p.skating + p.shooting + p.checking, reverse=True)
+
+    squads = [Squad() for _ in range(num_squads)]
+    for (i, player) in enumerate(players):
+        (draft_round, pick) = divmod(i, num_squads)
+        if draft_round % 2 == 1:
+            pick = num_squads - 1 - pick
+        squads[pick].players.append(player)
     return squads, waiting_list
 
 
+def _get_pick_work(num_players, squad_size):
+    # A pick tries every remaining player. Trying a player costs a fixed overhead plus an amount proportional to the
+    # size of the squad. The overhead is roughly the cost of 16 squad members.
+    return num_players * (squad_size + 1 + 16)
+
+
+def _get_total_work(num_squads, num_players, squad_size):
+    # the sum of _get_pick_work over every pick. Each round the squads pick in turn, then every squad has grown by one.
+    total_work = 0
+    while num_players > 0:
+        # the players left for the picks of this round are num_players, num_players - 1, ...
+        players_tried = num_squads * num_players - num_squads * (num_squads - 1) // 2
+        total_work += players_tried * (squad_size + 1 + 16)
+        num_players -= num_squads
+        squad_size += 1
+    return total_work
+
+
+def _check_deadline(deadline, remaining_seconds):
+    predicted_finish = time.monotonic() + remaining_seconds
+    if predicted_finish > deadline:
+        raise DeadlineExceeded("Predicted to finish %.3f seconds after the deadline" % (predicted_finish - deadline))
+
+
 def _decorate_players_with_delta_mean_data(players):
     (mean_skating, mean_shooting, mean_checking) = _get_mean_ratings(players)
     return [DeltaMeanPlayerDecorator(p, mean_skating, mean_shooting, mean_checking) for p in players]
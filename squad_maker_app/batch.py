@@ -0,0 +1,133 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Makes squads for many independent leagues at once, spread over a pool of worker processes.
+
+Each job is a (players, num_squads) tuple. Jobs are sent to the workers in chunks and each result is yielded as
+soon as it is finished, so results usually arrive out of order. Every result carries the index of its job.
+
+Classes:
+    BatchResult: The squads made for a single job, or the error that prevented them from being made.
+
+Functions:
+    make_squads_batch: makes squads for each job on a process pool and yields the results as they finish.
+    main: command line entry point that reads jobs from a JSON file and writes results as JSON lines.
+
+Usage:
+    python -m squad_maker_app.batch jobs.json [--processes N] [--chunksize N]
+
+    where jobs.json contains a list of {"roster": "/path/to/players.json", "numSquads": N} objects.
+"""
+
+import argparse
+import json
+import sys
+from functools import partial
+from multiprocessing import Pool
+
+from squad_maker_app.algorithms import make_squads_minimize_cumulative_delta_mean
+from squad_maker_app.data_sources import get_file_data_source
+from squad_maker_app.models import Squad
+
+ROSTER_KEY = 'roster'
+NUM_SQUADS_KEY = 'numSquads'
+DEFAULT_CHUNKSIZE = 1
+
+
+class BatchResult:
+    """ The squads made for a single job, or the error that prevented them from being made. """
+
+    def __init__(self, index, squads=None, waiting_list=None, error=None):
+        """ Creates the result of the job at ``index``.
+
+        Args:
+            index (int): The position of the job in the batch.
+            squads (list): The squads that were made, or None if the job failed.
+            waiting_list (list): The players on the waiting list, or None if the job failed.
+            error (str): A description of the problem with the job's input arguments, if any.
+        """
+        self.index = index
+        self.squads = squads
+        self.waiting_list = waiting_list
+        self.error = error
+
+    def to_dict(self):
+        if self.error:
+            return {'job': self.index, 'error': self.error}
+        return {'job': self.index,
+                'squads': [[_player_to_dict(p) for p in squad.players] for squad in self.squads],
+                'waitingList': [_player_to_dict(p) for p in self.waiting_list]}
+
+
+def make_squads_batch(jobs, algorithm=make_squads_minimize_cumulative_delta_mean, processes=None,
+                      chunksize=DEFAULT_CHUNKSIZE):
+    """ Makes squads for each job on a pool of worker processes.
+
+    Args:
+        jobs (iterable): (players, num_squads) tuples, one for each league.
+        algorithm (func): The squad making algorithm. It must be a module level function so it can be sent to the
+            worker processes.
+        processes (int): The number of worker processes. Defaults to the number of CPUs.
+        chunksize (int): The number of jobs sent to a worker at a time. Larger chunks lower the overhead of many
+            small jobs.
+
+    Yields:
+        ``BatchResult``: The result of each job, in the order the jobs finish.
+
+    """
+    with Pool(processes) as pool:
+        for result in pool.imap_unordered(partial(_run_job, algorithm), enumerate(jobs), chunksize):
+            yield result
+
+
+def _run_job(algorithm, indexed_job):
+    (index, (players, num_squads)) = indexed_job
+    try:
+        (squads, waiting_list) = algorithm(num_squads, players)
+    except ValueError as e:
+        # a ValueError indicates a problem with the job's input arguments, which shouldn't stop the other jobs
+        return BatchResult(index, error=str(e))
+    # the algorithm may return decorated objects, which can't be pickled, so send back the plain models
+    return BatchResult(index, [Squad([_undecorate(p) for p in squad.players]) for squad in squads],
+                       [_undecorate(p) for p in waiting_list])
+
+
+def _undecorate(player):
+    return getattr(player, 'delegate', player)
+
+
+def _player_to_dict(player):
+    return {'firstName': player.first_name, 'lastName': player.last_name, 'skating': player.skating,
+            'shooting': player.shooting, 'checking': player.checking}
+
+
+def read_jobs(jobs_file):
+    """ Reads (players, num_squads) jobs from a JSON file. Each roster file is only read once. """
+    with open(jobs_file, 'r') as f:
+        jobs_json = json.load(f)
+    rosters = {}
+    jobs = []
+    for job in jobs_json:
+        roster = job[ROSTER_KEY]
+        if roster not in rosters:
+            rosters[roster] = get_file_data_source(roster)()
+        jobs.append((rosters[roster], int(job[NUM_SQUADS_KEY])))
+    return jobs
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Makes squads for many leagues at once, on a process pool.")
+    parser.add_argument('jobs', help="A JSON file with a list of {\"%s\": file, \"%s\": N} jobs."
+                                     % (ROSTER_KEY, NUM_SQUADS_KEY))
+    parser.add_argument('--processes', type=int, default=None,
+                        help="The number of worker processes. Defaults to the number of CPUs.")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help="The number of jobs sent to a worker at a time.")
+    args = parser.parse_args(args)
+
+    for result in make_squads_batch(read_jobs(args.jobs), processes=args.processes, chunksize=args.chunksize):
+        sys.stdout.write(json.dumps(result.to_dict()) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
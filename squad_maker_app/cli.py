@@ -0,0 +1,122 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Command line tool that makes squads without starting the web app.
+
+The roster is read from a local file, a REST API uri, standard input, or is generated. The squads and the waiting
+list are written to standard output, one row per player, so the tool can be used in a pipeline. The time taken by
+each stage is reported on standard error.
+
+This module must not import Flask (directly, or through ``squad_maker_app.web``), so that it starts quickly.
+
+Functions:
+    read_players: reads ``Player`` objects from a roster location.
+    main: command line entry point.
+
+Usage:
+    python -m squad_maker_app (ROSTER | --generate N) --num-squads N [--engine NAME] [--format csv|json|ndjson]
+
+    where ROSTER is a player JSON file, a REST API uri, or - to read player JSON from standard input.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from squad_maker_app.data_sources import get_rest_data_source, get_file_data_source, get_generated_data_source, \
+    parse_players_json
+from squad_maker_app.engines import ENGINES, DEFAULT_ENGINE, run_engine
+from squad_maker_app.export import iter_rows, iter_csv, iter_ndjson
+from squad_maker_app.log_queue import timed
+
+STDIN_ROSTER = '-'
+REST_PREFIXES = ('http://', 'https://')
+CSV_FORMAT = 'csv'
+JSON_FORMAT = 'json'
+NDJSON_FORMAT = 'ndjson'
+
+
+def read_players(roster, stdin=None):
+    """ Reads ``Player`` objects from a roster location.
+
+    Args:
+        roster (str): The name of a player JSON file, a REST API uri, or '-' to read player JSON from ``stdin``.
+        stdin (file): The file to read from when ``roster`` is '-'. Defaults to ``sys.stdin``.
+
+    Returns:
+        list: The ``Player`` objects on the roster.
+
+    """
+    if roster == STDIN_ROSTER:
+        return parse_players_json((stdin or sys.stdin).read())
+    if roster.startswith(REST_PREFIXES):
+        return get_rest_data_source(roster)()
+    return get_file_data_source(roster)()
+
+
+def iter_json(squads, waiting_list):
+    """ Yields the rows of ``export.iter_rows`` as a single JSON list. """
+    yield json.dumps(list(iter_rows(squads, waiting_list))) + '\n'
+
+
+FORMATTERS = {
+    CSV_FORMAT: iter_csv,
+    JSON_FORMAT: iter_json,
+    NDJSON_FORMAT: iter_ndjson,
+}
+
+
+def main(args=None, stdin=None, stdout=None, stderr=None):
+    start = time.monotonic()
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    parser = argparse.ArgumentParser(prog='squad-maker', description="Makes squads from a roster of players.")
+    roster = parser.add_mutually_exclusive_group(required=True)
+    roster.add_argument('roster', nargs='?',
+                        help="A player JSON file, a REST API uri, or %s to read player JSON from standard input."
+                             % STDIN_ROSTER)
+    roster.add_argument('--generate', type=int, metavar='N', help="Generate a roster of N random players instead.")
+    parser.add_argument('--num-squads', type=int, required=True, help="The number of squads to make.")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                        help="The squad making engine. Defaults to '%s'." % DEFAULT_ENGINE)
+    parser.add_argument('--format', choices=sorted(FORMATTERS), default=CSV_FORMAT,
+                        help="The output format. Defaults to '%s'." % CSV_FORMAT)
+    args = parser.parse_args(args)
+
+    timings = {}
+    try:
+        with timed(timings, 'read'):
+            if args.generate is not None:
+                players = get_generated_data_source(args.generate)()
+            else:
+                players = read_players(args.roster, stdin)
+    except Exception as e:
+        # a missing file or an unreachable uri raises an OSError (including requests' errors), bad JSON raises a
+        # ValueError, and a malformed player raises a plain Exception
+        parser.error("Failed to read the roster '%s': %s" % (args.roster, e))
+    try:
+        with timed(timings, 'assign'):
+            (squads, waiting_list, engine) = run_engine(args.engine, args.num_squads, players)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        with timed(timings, 'write'):
+            for chunk in FORMATTERS[args.format](squads, waiting_list):
+                stdout.write(chunk)
+            stdout.flush()
+    except BrokenPipeError:
+        # the next command in the pipeline stopped reading (e.g. head), which isn't an error
+        if stdout is sys.stdout:
+            # stop python from flushing the closed pipe again at exit
+            sys.stdout = None
+        return
+
+    stderr.write("Made %d squads from %d players with %d players on the waiting list using the '%s' engine "
+                 "(read %.3fs, assign %.3fs, write %.3fs, total %.3fs)\n"
+                 % (len(squads), len(players), len(waiting_list), engine, timings['read'], timings['assign'],
+                    timings['write'], time.monotonic() - start))
+
+
+if __name__ == '__main__':
+    main()
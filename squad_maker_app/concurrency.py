@@ -0,0 +1,78 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains tools for sharing and limiting expensive work between concurrent requests.
+
+Classes:
+    SingleFlight: Coalesces concurrent calls with the same key into a single call.
+    ServerBusy: Raised when an expensive operation is refused because too many are already running.
+"""
+
+import threading
+
+
+class ServerBusy(Exception):
+    """ Raised when an expensive operation is refused because too many are already running. """
+
+
+class SingleFlight:
+    """ Coalesces concurrent calls with the same key into a single call.
+
+    The first caller for a key runs the function. Callers that arrive with the same key while it is running wait for
+    it to finish and share its result, or its error. Once the call finishes the key is forgotten, so later callers
+    run the function again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, timeout=None):
+        """ Calls ``func``, unless a call with the same ``key`` is already running, in which case its result is shared.
+
+        Args:
+            key: A hashable value identifying the work done by ``func``.
+            func (func): Zero-argument function that does the work.
+            timeout (float): The number of seconds to wait for a call that is already running, or None to wait for
+                as long as it takes.
+
+        Returns:
+            object, bool: A (result, shared) tuple, where shared is True if the result came from another caller's
+            call.
+
+        Raises:
+            TimeoutError: If the call that is already running doesn't finish within ``timeout`` seconds. The call
+                carries on for the callers still waiting for it.
+            Exception: Whatever ``func`` raised, in every caller sharing the call.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("The shared call for %r didn't finish within %.3f seconds" % (key, timeout))
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
@@ -5,13 +5,16 @@
 Functions:
     get_rest_data_source: returns a function to GET ``Player`` JSON from a REST API uri.
     get_file_data_source: returns a function to read ``Player`` JSON from a local file.
+    read_players_json: reads raw ``Player`` JSON from a REST API uri or a local file.
+    parse_players_json_by_id: parses ``Player`` JSON into a dictionary of players keyed by id.
+    players_to_json: converts ``Player`` objects to JSON in the expected format.
     get_generated_data_source: returns a function that generates fake ``Player`` data for testing purposes.
     generate_players: generates the specified number of fake Player objects, for testing purposes.
 """
 
 import json
+import os
 import random
-import requests
 from squad_maker_app.models import Player
 
 # Player JSON keys
@@ -43,6 +46,8 @@ def get_rest_data_source(uri):
 
     """
     def players_from_rest():
+        # requests is slow to import, so it is only imported when it is needed
+        import requests
         response = requests.get(uri)
         response.raise_for_status()
         return parse_players_json(response.text)
@@ -68,10 +73,62 @@ def get_file_data_source(filename):
     return players_from_file
 
 
+def read_players_json(location):
+    """ Reads raw ``Player`` JSON without parsing it.
+
+    Args:
+        location (str): The name of a local file, or a REST endpoint uri, to read data from.
+
+    Returns:
+        str: The player JSON.
+
+    """
+    if os.path.isfile(location):
+        with open(location, 'r') as f:
+            return f.read()
+    import requests
+    response = requests.get(location)
+    response.raise_for_status()
+    return response.text
+
+
 def parse_players_json(json_str):
+    return list(parse_players_json_by_id(json_str).values())
+
+
+def parse_players_json_by_id(json_str):
+    """ Parses ``Player`` JSON into a dictionary of players keyed by their JSON id.
+
+    Args:
+        json_str (str): The player data, in the expected JSON format.
+
+    Returns:
+        dict: The parsed ``Player`` objects keyed by id. Duplicate entries are removed.
+
+    """
     players_json = json.loads(json_str).get(PLAYERS_KEY)
     players_by_id = dict((p[ID_KEY], p) for p in players_json)  # removes duplicate entries
-    return [_parse_player_json(p) for p in players_by_id.values()]
+    return dict((player_id, _parse_player_json(p)) for (player_id, p) in players_by_id.items())
+
+
+def players_to_json(players):
+    """ Converts ``Player`` objects to JSON in the expected format. This is the inverse of ``parse_players_json``.
+
+    Args:
+        players (list): The ``Player`` objects to convert. Each player is given its position in the list as its id.
+
+    Returns:
+        str: The player JSON.
+
+    """
+    players_json = [{ID_KEY: str(i),
+                     FIRST_NAME_KEY: p.first_name,
+                     LAST_NAME_KEY: p.last_name,
+                     SKILLS_KEY: [{SKILL_TYPE_KEY: SKATING_SKILL, SKILL_RATING_KEY: p.skating},
+                                  {SKILL_TYPE_KEY: SHOOTING_SKILL, SKILL_RATING_KEY: p.shooting},
+                                  {SKILL_TYPE_KEY: CHECKING_SKILL, SKILL_RATING_KEY: p.checking}]}
+                    for (i, p) in enumerate(players)]
+    return json.dumps({PLAYERS_KEY: players_json})
 
 
 def _parse_player_json(player_json):
@@ -14,4 +14,42 @@ SECRET_KEY = 'dev'
 
 # By default read generated player data from json-generator.com.
 # TODO: When the player REST API is available update this uri.
-PLAYER_SOURCE = get_rest_data_source("http://www.json-generator.com/api/json/get/bVlwKzZWbm?indent=2")
\ No newline at end of file
+PLAYER_SOURCE = get_rest_data_source("http://www.json-generator.com/api/json/get/bVlwKzZWbm?indent=2")
+
+# Rules for selecting a squad making engine by roster size and number of squads. The first rule whose optional
+# 'max_players' and 'max_squads' limits fit the request selects the engine. See squad_maker_app.engines.
+SQUAD_ENGINE_RULES = [
+    {'engine': 'delta-mean', 'max_players': 1000},
+    {'engine': 'snake-draft'},
+]
+
+# The number of seconds a request may take to make squads, or None for no deadline. Each request may set its own
+# deadline with the 'deadlineMs' argument. If the selected engine won't finish before the deadline the squads are
+# made with the fallback engine instead.
+SQUAD_ENGINE_DEADLINE = 2.0
+SQUAD_ENGINE_FALLBACK = 'snake-draft'
+
+# When True the memory used by each stage of a request (parse, assign, render) is measured with tracemalloc and
+# logged as JSON. Profiling slows requests down considerably, so only enable it while diagnosing memory use. Only
+# one stage is measured at a time across all requests, and the parse stage includes fetching the roster, so while
+# profiling every request waits for any other request's roster fetch.
+PROFILE_MEMORY = False
+
+# The number of rendered pages kept in memory for conditional (ETag) responses, and the size in bytes above which
+# pages are compressed with brotli (if installed) or gzip.
+RESPONSE_CACHE_SIZE = 64
+COMPRESSION_MIN_BYTES = 1024
+
+# Whenever the roster changes, squads are made on a background thread for this many of the most frequently requested
+# squad counts (0 to disable), and up to PRECOMPUTE_MAX_RESULTS finished results are kept. Hit rates and the time
+# saved are reported at /stats/precompute.
+PRECOMPUTE_SQUAD_COUNTS = 3
+PRECOMPUTE_MAX_RESULTS = 32
+
+# The number of squad builds that may run at once. Further requests that need a new build get a 503 response asking
+# them to retry after BUSY_RETRY_AFTER seconds. Concurrent requests for the same squads share a single build.
+MAX_CONCURRENT_BUILDS = 4
+BUSY_RETRY_AFTER = 1
+
+# The file the app logs to, relative to the working directory. See the Logging section of the README.
+LOG_FILE = 'instance.log'
@@ -0,0 +1,94 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains the registry of squad making engines, and selects an engine for a given roster.
+
+An engine is a squad making algorithm registered under a name. Engines are selected with a list of rules, where
+each rule is a dictionary such as ``{'engine': 'delta-mean', 'max_players': 2000, 'max_squads': 50}``. The first
+rule whose optional 'max_players' and 'max_squads' limits fit the roster selects the engine.
+
+Functions:
+    get_engine: returns the squad making algorithm registered under a name.
+    select_engine: returns the name of the engine selected by a list of rules.
+    run_engine: makes squads with an engine, falling back to a cheaper engine if a deadline would be missed.
+"""
+
+import inspect
+from squad_maker_app.algorithms import make_random_squads, make_squads_minimize_cumulative_delta_mean, \
+    make_squads_snake_draft, DeadlineExceeded
+
+ENGINE_KEY = 'engine'
+MAX_PLAYERS_KEY = 'max_players'
+MAX_SQUADS_KEY = 'max_squads'
+
+ENGINES = {
+    'delta-mean': make_squads_minimize_cumulative_delta_mean,
+    'snake-draft': make_squads_snake_draft,
+    'random': make_random_squads,
+}
+DEFAULT_ENGINE = 'delta-mean'
+
+
+def get_engine(name):
+    """ Returns the squad making algorithm registered under ``name``.
+
+    Raises:
+        Exception: If no engine is registered under ``name``.
+
+    """
+    if name not in ENGINES:
+        raise Exception("Unknown squad engine '%s'. Registered engines are: %s" % (name, ", ".join(sorted(ENGINES))))
+    return ENGINES[name]
+
+
+def select_engine(rules, num_players, num_squads, default=DEFAULT_ENGINE):
+    """ Selects an engine for a roster of ``num_players`` players and ``num_squads`` squads.
+
+    Args:
+        rules (list): The selection rules, in order of preference.
+        num_players (int): The number of players on the roster.
+        num_squads (int): The number of squads to make.
+        default (str): The name of the engine to use if no rule matches.
+
+    Returns:
+        str: The name of the selected engine.
+
+    """
+    for rule in rules or []:
+        max_players = rule.get(MAX_PLAYERS_KEY)
+        max_squads = rule.get(MAX_SQUADS_KEY)
+        if (max_players is None or num_players <= max_players) and (max_squads is None or num_squads <= max_squads):
+            return rule[ENGINE_KEY]
+    return default
+
+
+def run_engine(name, num_squads, players, deadline=None, fallback=None):
+    """ Makes squads with the engine registered under ``name``.
+
+    Engines that accept a ``deadline`` argument are abandoned as soon as they are predicted to miss it, and the
+    squads are made with the ``fallback`` engine instead.
+
+    Args:
+        name (str): The name of the engine.
+        num_squads (int): The number of squads to make.
+        players (list): The available players.
+        deadline (float): Optional ``time.monotonic()`` value by which the squads should be made.
+        fallback (str): The name of the engine to use if ``deadline`` will be missed. If None, the
+            ``DeadlineExceeded`` error is raised instead.
+
+    Returns:
+        list(``Squad``), list(``Player``), str: A (squads, waiting_list, engine) tuple, where engine is the name of
+        the engine that made the squads.
+
+    """
+    algorithm = get_engine(name)
+    if deadline is None or 'deadline' not in inspect.signature(algorithm).parameters:
+        (squads, waiting_list) = algorithm(num_squads, players)
+        return squads, waiting_list, name
+    try:
+        (squads, waiting_list) = algorithm(num_squads, players, deadline=deadline)
+        return squads, waiting_list, name
+    except DeadlineExceeded:
+        if fallback is None:
+            raise
+    (squads, waiting_list) = get_engine(fallback)(num_squads, players)
+    return squads, waiting_list, fallback
@@ -0,0 +1,67 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains generators that export squads and the waiting list one row at a time.
+
+There is one row per player, with the player's squad number, ratings, and the averages of the player's squad.
+Players on the waiting list have no squad number or squad averages. Each row is formatted only when it is
+requested, so the memory used by an export doesn't grow with the size of the output.
+
+Functions:
+    iter_rows: yields a dictionary for each player in the squads and on the waiting list.
+    iter_csv: yields the export as lines of CSV, starting with a header line.
+    iter_ndjson: yields the export as lines of newline delimited JSON.
+"""
+
+import csv
+import io
+import json
+
+SQUAD_COLUMN = 'squad'
+COLUMNS = [SQUAD_COLUMN, 'firstName', 'lastName', 'skating', 'shooting', 'checking', 'squadSkatingAverage',
+           'squadShootingAverage', 'squadCheckingAverage']
+
+
+def iter_rows(squads, waiting_list):
+    """ Yields a dictionary for each player, keyed by the names in ``COLUMNS``.
+
+    Args:
+        squads (list): The ``Squad`` objects, numbered from 1 in the order given.
+        waiting_list (list): The ``Player`` objects on the waiting list.
+
+    """
+    for (number, squad) in enumerate(squads, start=1):
+        averages = (squad.skating_average, squad.shooting_average, squad.checking_average)
+        for player in squad.players:
+            yield _get_row(number, player, averages)
+    for player in waiting_list:
+        yield _get_row(None, player, (None, None, None))
+
+
+def _get_row(squad_number, player, averages):
+    return dict(zip(COLUMNS, (squad_number, player.first_name, player.last_name, player.skating, player.shooting,
+                              player.checking) + averages))
+
+
+def iter_csv(squads, waiting_list):
+    """ Yields a CSV header line, followed by a line for each player. """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    yield _drain(buffer)
+    for row in iter_rows(squads, waiting_list):
+        writer.writerow(row)
+        yield _drain(buffer)
+
+
+def iter_ndjson(squads, waiting_list):
+    """ Yields a line of JSON for each player. """
+    for row in iter_rows(squads, waiting_list):
+        yield json.dumps(row) + '\n'
+
+
+def _drain(buffer):
+    # return what has been written to the buffer so far, and empty it so it never holds more than one row
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
@@ -0,0 +1,133 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains utilities for conditional (ETag) and compressed responses.
+
+Squads are a deterministic function of the roster, the number of squads, and the templates they are rendered with,
+so each page is identified by a fingerprint of those inputs. The fingerprint is used as a strong ETag, and the
+rendered (and compressed) pages are kept in a bounded cache keyed by their ETag.
+
+Classes:
+    ResponseCache: A thread-safe, bounded LRU cache of response bodies.
+
+Functions:
+    roster_fingerprint: returns a fingerprint of a list of ``Player`` objects.
+    get_template_version: returns a fingerprint of an app's template sources.
+    make_etag: returns a strong ETag for the given fingerprint parts and content encoding.
+    choose_encoding: chooses the best supported content encoding from a request's Accept-Encoding header.
+    compress: compresses a response body with the given content encoding.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    # brotli compression is optional, gzip is used when it isn't installed
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+DEFAULT_CACHE_SIZE = 64
+
+
+def roster_fingerprint(players):
+    """ Returns a fingerprint of the given players that changes whenever any player, or the order of players, does.
+
+    Args:
+        players (list): The ``Player`` objects to fingerprint.
+
+    Returns:
+        str: The hex digest of the fingerprint.
+
+    """
+    digest = hashlib.sha1()
+    for p in players:
+        digest.update(repr((p.first_name, p.last_name, p.skating, p.shooting, p.checking)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_template_version(app):
+    """ Returns a fingerprint of the sources of every template in ``app``. """
+    digest = hashlib.sha1()
+    for name in sorted(app.jinja_env.list_templates()):
+        (source, _, _) = app.jinja_loader.get_source(app.jinja_env, name)
+        digest.update(name.encode('utf-8'))
+        digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def make_etag(parts, encoding=None):
+    """ Returns a strong ETag for a page identified by ``parts``.
+
+    Each content encoding of a page is a different representation, so it gets a different ETag.
+
+    Args:
+        parts (list): Values that together identify the content of the page.
+        encoding (str): The content encoding of the response, or None if it isn't compressed.
+
+    Returns:
+        str: The ETag.
+
+    """
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return '%s-%s' % (digest, encoding) if encoding else digest
+
+
+def choose_encoding(accept_encodings):
+    """ Chooses the best supported content encoding.
+
+    Args:
+        accept_encodings (``werkzeug.datastructures.Accept``): The request's parsed Accept-Encoding header.
+
+    Returns:
+        str: 'br', 'gzip', or None if the client doesn't accept a supported encoding.
+
+    """
+    if brotli is not None and accept_encodings[BROTLI] > 0:
+        return BROTLI
+    if accept_encodings[GZIP] > 0:
+        return GZIP
+    return None
+
+
+def compress(body, encoding):
+    """ Compresses ``body`` (bytes) with the given content encoding. """
+    if encoding == BROTLI:
+        return brotli.compress(body)
+    if encoding == GZIP:
+        return gzip.compress(body)
+    raise ValueError("Unsupported content encoding '%s'" % encoding)
+
+
+class ResponseCache:
+    """ A thread-safe, bounded LRU cache of response bodies. """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        """ Creates an empty cache.
+
+        Args:
+            max_entries (int): The number of entries to keep. The least recently used entry is evicted first.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,100 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains a non-blocking logging pipeline for the request path.
+
+Log records are put on an in-memory queue by the request thread, and a background thread formats them and writes
+them to disk. Messages are formatted lazily by the background thread, so logging calls must pass their arguments
+separately (``logger.info("Sourced %d players", n)``) and must not mutate the arguments after logging them.
+
+Records are written as JSON lines. Structured values passed with ``extra``, such as the roster size, the number of
+squads and stage timings, are written as separate fields so the log can be analysed by other tools.
+
+Classes:
+    StructuredFormatter: Formats log records as JSON lines, including any structured fields.
+
+Functions:
+    start_queue_logging: routes a logger's records through a queue to a handler on a background thread.
+    stop_queue_logging: stops routing a logger's records through a queue.
+    timed: context manager that records the duration of a stage in a timings dictionary.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+# the keys of the structured values that may be passed to a logger with ``extra``
+STRUCTURED_FIELDS = ['path', 'roster_size', 'num_squads', 'engine', 'cache', 'precomputed', 'coalesced', 'timings',
+                     'memory_profile']
+
+
+class StructuredFormatter(logging.Formatter):
+    """ Formats log records as JSON lines, including any structured fields. """
+
+    def format(self, record):
+        entry = {'time': self.formatTime(record),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'message': record.getMessage()}
+        for field in STRUCTURED_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+
+    def prepare(self, record):
+        # QueueHandler formats the message before queuing it. Queue the record as it is instead, so the
+        # message is formatted on the background thread.
+        return record
+
+
+def start_queue_logging(logger, handler):
+    """ Routes the records of ``logger`` through a queue to ``handler``, which runs on a background thread.
+
+    The background thread is stopped, and any queued records are written, when the interpreter exits. If the logger
+    was already routed through a queue its previous background thread is stopped first, so calling this again (e.g.
+    each time an app is created) doesn't write every record more than once.
+
+    Args:
+        logger (``logging.Logger``): The logger used on the request path.
+        handler (``logging.Handler``): The handler that writes the records, e.g. to a file.
+
+    Returns:
+        ``logging.handlers.QueueListener``: The started listener that owns the background thread.
+
+    """
+    stop_queue_logging(logger)
+    records = queue.Queue()
+    queue_handler = _LazyQueueHandler(records)
+    queue_handler.listener = QueueListener(records, handler, respect_handler_level=True)
+    logger.addHandler(queue_handler)
+    queue_handler.listener.start()
+    atexit.register(queue_handler.listener.stop)
+    return queue_handler.listener
+
+
+def stop_queue_logging(logger):
+    """ Stops routing the records of ``logger`` through a queue, after writing any queued records. """
+    for queue_handler in [h for h in logger.handlers if isinstance(h, _LazyQueueHandler)]:
+        logger.removeHandler(queue_handler)
+        atexit.unregister(queue_handler.listener.stop)
+        queue_handler.listener.stop()
+        for handler in queue_handler.listener.handlers:
+            handler.close()
+
+
+@contextmanager
+def timed(timings, stage):
+    """ Records the number of seconds the body of the ``with`` statement takes as ``timings[stage]``. """
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.monotonic() - start, 6)
@@ -0,0 +1,191 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Speculatively makes squads for the most popular squad counts whenever the roster changes.
+
+Most requests ask for one of a handful of squad counts. The precomputer counts how often each squad count is
+requested, and when it sees a new roster it makes squads for the most popular counts on a background thread. The
+results are kept in a bounded store, so a typical request only has to read a finished result. Squads made by a
+request can be added to the store too, so they aren't precomputed again.
+
+Classes:
+    SquadPrecomputer: Tracks popular squad counts and precomputes their squads on a background thread.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from squad_maker_app.concurrency import ServerBusy
+
+DEFAULT_TOP_COUNTS = 3
+DEFAULT_MAX_RESULTS = 32
+# the number of different squad counts whose requests are counted
+MAX_TRACKED_COUNTS = 64
+
+
+class SquadPrecomputer:
+    """ Tracks popular squad counts and precomputes their squads on a background thread. """
+
+    def __init__(self, make_squads, top_counts=DEFAULT_TOP_COUNTS, max_results=DEFAULT_MAX_RESULTS, logger=None):
+        """ Creates a precomputer with an empty store.
+
+        Args:
+            make_squads (func): Function that takes (players, num_squads) and returns the finished result for
+                them. The result is shared between requests, so it must not be modified after it is returned. It
+                may raise ``ServerBusy`` to skip a squad count when there is no capacity to make it.
+            top_counts (int): The number of most popular squad counts to precompute when the roster changes.
+            max_results (int): The number of results to keep. The least recently used result is evicted first.
+            logger (``logging.Logger``): Optional logger for the background thread.
+        """
+        self.make_squads = make_squads
+        self.top_counts = top_counts
+        self.max_results = max_results
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._requested = Counter()
+        self._results = OrderedDict()
+        self._fingerprint = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+        self._hits = 0
+        self._misses = 0
+        self._precomputed = 0
+        self._seconds_saved = 0.0
+
+    def record_request(self, num_squads, num_players=None):
+        """ Records that squads were requested for ``num_squads``.
+
+        The squad counts come from clients, so counts that can't be made from the roster are ignored, and only
+        ``MAX_TRACKED_COUNTS`` different counts are tracked. A new count replaces the least requested count once
+        that many are tracked.
+
+        Args:
+            num_squads (int): The requested number of squads.
+            num_players (int): The number of players on the roster, if known.
+        """
+        if num_squads < 1 or (num_players is not None and num_squads > num_players):
+            return
+        with self._lock:
+            if num_squads not in self._requested and len(self._requested) >= MAX_TRACKED_COUNTS:
+                (least_requested, _) = min(self._requested.items(), key=lambda item: item[1])
+                del self._requested[least_requested]
+            self._requested[num_squads] += 1
+
+    def roster_seen(self, fingerprint, players):
+        """ Starts precomputing squads for the most popular squad counts, if ``fingerprint`` is a new roster.
+
+        Args:
+            fingerprint (str): The fingerprint of ``players``.
+            players (list): The ``Player`` objects on the roster. The list must not be modified afterwards.
+        """
+        with self._lock:
+            if fingerprint == self._fingerprint or self.top_counts <= 0:
+                return
+            self._fingerprint = fingerprint
+            counts = [n for (n, _) in self._requested.most_common(self.top_counts)]
+            # results for older rosters will never be read again
+            for key in [k for k in self._results if k[0] != fingerprint]:
+                del self._results[key]
+            if counts:
+                self._future = self._executor.submit(self._precompute, fingerprint, list(players), counts)
+
+    def get(self, fingerprint, num_squads):
+        """ Returns the stored result for ``num_squads`` squads from the roster ``fingerprint``, or None. """
+        with self._lock:
+            entry = self._results.get((fingerprint, num_squads))
+            if entry is None:
+                self._misses += 1
+                return None
+            self._results.move_to_end((fingerprint, num_squads))
+            (result, seconds) = entry
+            self._hits += 1
+            self._seconds_saved += seconds
+            return result
+
+    def peek(self, fingerprint, num_squads):
+        """ Like ``get``, but doesn't count a hit or a miss. """
+        with self._lock:
+            entry = self._results.get((fingerprint, num_squads))
+            return entry[0] if entry is not None else None
+
+    def put(self, fingerprint, num_squads, result, seconds):
+        """ Stores a result made outside of the precomputer, e.g. by a request, so it isn't precomputed again.
+
+        The result is ignored if ``fingerprint`` isn't the latest roster, or a result is already stored.
+
+        Args:
+            fingerprint (str): The fingerprint of the roster the result was made from.
+            num_squads (int): The number of squads in the result.
+            result (object): The result, in the form returned by ``make_squads``.
+            seconds (float): The number of seconds it took to make the result.
+        """
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                self._store(fingerprint, num_squads, result, seconds)
+
+    def wait(self):
+        """ Waits for the most recently started precomputation to finish. """
+        future = self._future
+        if future is not None:
+            future.result()
+
+    def stats(self):
+        """ Returns the hit rate and the time saved by precomputed results.
+
+        Returns:
+            dict: The number of hits, misses, results precomputed, and results stored, the hit rate, the total
+            number of seconds saved, and the number of requests for each squad count.
+
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'hit_rate': self._hits / lookups if lookups else 0.0,
+                    'seconds_saved': round(self._seconds_saved, 6),
+                    'precomputed': self._precomputed,
+                    'stored': len(self._results),
+                    'requested': dict(self._requested)}
+
+    def _precompute(self, fingerprint, players, counts):
+        for num_squads in counts:
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    # the roster changed again, a newer precomputation has been started
+                    return
+                if (fingerprint, num_squads) in self._results:
+                    # a request already made these squads
+                    continue
+            start = time.monotonic()
+            try:
+                result = self.make_squads(players, num_squads)
+            except ValueError:
+                # e.g. the new roster doesn't have enough players for this many squads
+                continue
+            except ServerBusy:
+                # requests come first, the squads will be made by the first request for them
+                if self.logger:
+                    self.logger.info("Skipped precomputing %d squads, the server is busy", num_squads)
+                continue
+            except Exception:
+                if self.logger:
+                    self.logger.exception("Failed to precompute %d squads", num_squads)
+                continue
+            seconds = time.monotonic() - start
+            with self._lock:
+                if not self._store(fingerprint, num_squads, result, seconds):
+                    # make_squads shared the result of a request, which stored it
+                    continue
+                self._precomputed += 1
+            if self.logger:
+                self.logger.info("Precomputed %d squads in %.3f seconds", num_squads, seconds,
+                                 extra={'roster_size': len(players), 'num_squads': num_squads})
+
+    def _store(self, fingerprint, num_squads, result, seconds):
+        # must be called with the lock held. Returns False if a result was already stored.
+        if (fingerprint, num_squads) in self._results:
+            return False
+        self._results[(fingerprint, num_squads)] = (result, seconds)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+        return True
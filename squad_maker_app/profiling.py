@@ -0,0 +1,85 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains tools for measuring the memory used by each stage of making squads.
+
+Classes:
+    MemoryProfiler: Records the peak and retained memory of named stages with tracemalloc.
+"""
+
+import json
+import platform
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+class MemoryProfiler:
+    """ Records the peak and retained memory of named stages with tracemalloc.
+
+    Stages are measured one at a time. Tracing is started when a stage begins and stopped when it ends, so code
+    outside of the stages runs at full speed.
+    """
+
+    # tracemalloc is global to the interpreter, so stages in different threads must not overlap. A stage holds the
+    # lock for as long as its body runs, including any I/O it does.
+    _lock = threading.Lock()
+
+    def __init__(self, enabled=True):
+        """ Creates a memory profiler.
+
+        Args:
+            enabled (bool): If False, stages run without being measured or recorded.
+        """
+        self.enabled = enabled
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """ Measures the memory used by the body of the ``with`` statement.
+
+        Args:
+            name (str): The name of the stage, e.g. 'parse' or 'render'.
+            **labels: Extra values to record with the stage, such as the roster size.
+        """
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            was_tracing = tracemalloc.is_tracing()
+            if was_tracing:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            (start_bytes, _) = tracemalloc.get_traced_memory()
+            try:
+                yield
+            finally:
+                (end_bytes, peak_bytes) = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                if not was_tracing:
+                    tracemalloc.stop()
+                retained_blocks = sum(s.count_diff for s in after.compare_to(before, 'lineno') if s.count_diff > 0)
+                record = {'stage': name,
+                          'peak_bytes': peak_bytes - start_bytes,
+                          'retained_bytes': end_bytes - start_bytes,
+                          'retained_blocks': retained_blocks}
+                record.update(labels)
+                self.stages.append(record)
+
+    def to_dict(self):
+        """ Returns the recorded stages, together with the python version they were recorded with.
+
+        ``peak_bytes`` is the largest amount of extra memory in use at any point during a stage. ``retained_bytes``
+        is the extra memory still in use at the end of the stage, and ``retained_blocks`` is the number of extra
+        memory blocks still allocated at the end of the stage. Blocks that were allocated and freed during the stage
+        aren't counted, so ``retained_blocks`` is not the number of allocations the stage made.
+        """
+        return {'python': platform.python_version(), 'stages': list(self.stages)}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def write_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
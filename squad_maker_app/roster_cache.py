@@ -0,0 +1,130 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains a roster cache that is shared by every process on the local machine.
+
+When the app runs under several WSGI worker processes each worker would otherwise fetch and parse the roster on its
+own. The shared cache stores the parsed roster in a local file. Whenever the cached roster becomes stale a single
+worker refreshes it while holding an exclusive file lock, and every other worker reads the parsed roster straight
+from the file.
+
+Classes:
+    SharedRosterCache: A file backed ``Player`` cache that is shared between processes.
+
+Functions:
+    get_shared_cache_data_source: returns a function that reads ``Player`` data through a ``SharedRosterCache``.
+"""
+
+import fcntl
+import os
+import pickle
+import tempfile
+import time
+
+DEFAULT_MAX_AGE = 60
+DEFAULT_MAX_STALE = 300
+LOCK_FILE_SUFFIX = '.lock'
+
+
+def get_shared_cache_data_source(source, cache_file, max_age=DEFAULT_MAX_AGE, max_stale=DEFAULT_MAX_STALE):
+    """ Returns a source of ``Player`` data that is cached in a file shared by all local processes.
+
+    Args:
+        source (func): Zero-argument function that returns the up-to-date list of ``Player`` objects.
+        cache_file (str): The name of the file that stores the cached players.
+        max_age (float): The number of seconds a cached roster is considered fresh.
+        max_stale (float): The number of seconds past ``max_age`` that a stale roster may still be served while
+            another process is refreshing it.
+
+    Returns:
+        func: Zero-argument function that returns the cached ``Player`` data.
+
+    """
+    return SharedRosterCache(source, cache_file, max_age, max_stale).get_players
+
+
+class SharedRosterCache:
+    """ A file backed ``Player`` cache that is shared between processes. """
+
+    def __init__(self, source, cache_file, max_age=DEFAULT_MAX_AGE, max_stale=DEFAULT_MAX_STALE):
+        """ Creates a cache of the players returned by ``source``.
+
+        Args:
+            source (func): Zero-argument function that returns the up-to-date list of ``Player`` objects.
+            cache_file (str): The name of the file that stores the cached players.
+            max_age (float): The number of seconds a cached roster is considered fresh.
+            max_stale (float): The number of seconds past ``max_age`` that a stale roster may still be served
+                while another process is refreshing it.
+        """
+        if max_age < 0 or max_stale < 0:
+            raise ValueError("The cache staleness bounds must be larger than or equal to zero.")
+        self.source = source
+        self.cache_file = cache_file
+        self.lock_file = cache_file + LOCK_FILE_SUFFIX
+        self.max_age = max_age
+        self.max_stale = max_stale
+        # the most recently read (file identity, fetched at, players) entry, so unchanged files aren't re-read
+        self._file_id = None
+        self._entry = None
+
+    def get_players(self):
+        """ Returns the cached players, refreshing the cache first if it is stale.
+
+        Returns:
+            list(``Player``): A copy of the cached list of players.
+
+        """
+        entry = self._read()
+        if self._is_fresh(entry):
+            return list(entry[1])
+
+        with open(self.lock_file, 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # another process is refreshing the cache
+                if entry and self._age(entry) <= self.max_age + self.max_stale:
+                    return list(entry[1])
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # the cache may have been refreshed while we were waiting for the lock
+                entry = self._read()
+                if not self._is_fresh(entry):
+                    entry = self._refresh()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return list(entry[1])
+
+    def _is_fresh(self, entry):
+        return entry is not None and self._age(entry) <= self.max_age
+
+    @staticmethod
+    def _age(entry):
+        return time.time() - entry[0]
+
+    def _read(self):
+        try:
+            stat = os.stat(self.cache_file)
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id != self._file_id:
+            with open(self.cache_file, 'rb') as f:
+                self._entry = pickle.load(f)
+            self._file_id = file_id
+        return self._entry
+
+    def _refresh(self):
+        entry = (time.time(), self.source())
+        # write to a temporary file and then rename it, so readers never see a partially written cache
+        (fd, temp_file) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache_file)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, self.cache_file)
+        except Exception:
+            os.remove(temp_file)
+            raise
+        stat = os.stat(self.cache_file)
+        self._file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._entry = entry
+        return entry
@@ -0,0 +1,154 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains a durable local store of ``Player`` data, backed by SQLite.
+
+The store is kept up to date by syncing it with the upstream player JSON, which only writes the players that were
+added, changed, or removed. Requests then read the roster from the store with a single indexed query, so request
+latency no longer depends on the size of the upstream JSON payload.
+
+Classes:
+    RosterStore: A SQLite store of ``Player`` data keyed by the upstream player id.
+
+Functions:
+    get_roster_store_data_source: returns a function that reads ``Player`` data from a ``RosterStore``.
+    sync_roster_store: syncs a ``RosterStore`` file with the given player JSON.
+"""
+
+import os
+import queue
+import sqlite3
+from contextlib import closing
+from urllib.request import pathname2url
+from squad_maker_app.data_sources import parse_players_json_by_id
+from squad_maker_app.models import Player
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    skating REAL NOT NULL,
+    shooting REAL NOT NULL,
+    checking REAL NOT NULL,
+    total_rating REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_total_rating ON players (total_rating);
+CREATE INDEX IF NOT EXISTS players_skating ON players (skating);
+CREATE INDEX IF NOT EXISTS players_shooting ON players (shooting);
+CREATE INDEX IF NOT EXISTS players_checking ON players (checking);
+"""
+
+
+def get_roster_store_data_source(filename, min_rating=None):
+    """ Returns a ``RosterStore`` source of ``Player`` data.
+
+    Args:
+        filename (str): The name of the SQLite database file.
+        min_rating (float): If given, only players with a total rating larger than or equal to ``min_rating`` are
+            returned.
+
+    Returns:
+        func: Zero-argument function that reads ``Player`` data from the store.
+
+    """
+    # create the file and the players table now, so reading the players never runs DDL
+    with closing(RosterStore(filename)):
+        pass
+    # read-only connections that aren't in use, so requests reuse connections rather than opening their own
+    idle_stores = queue.LifoQueue()
+
+    def players_from_store():
+        try:
+            store = idle_stores.get_nowait()
+        except queue.Empty:
+            store = RosterStore(filename, read_only=True)
+        try:
+            return store.get_players(min_rating=min_rating)
+        finally:
+            idle_stores.put(store)
+    return players_from_store
+
+
+def sync_roster_store(filename, json_str):
+    """ Syncs the ``RosterStore`` in ``filename`` with the given player JSON.
+
+    Args:
+        filename (str): The name of the SQLite database file. It is created if it doesn't exist.
+        json_str (str): The up-to-date player data, in the expected JSON format.
+
+    Returns:
+        int, int: An (upserted, deleted) tuple with the number of players that were written and removed.
+
+    """
+    with closing(RosterStore(filename)) as store:
+        return store.sync(parse_players_json_by_id(json_str))
+
+
+class RosterStore:
+    """ A SQLite store of ``Player`` data keyed by the upstream player id. """
+
+    def __init__(self, filename, read_only=False):
+        """ Opens the store in the given file, creating the file and the players table if necessary.
+
+        Args:
+            filename (str): The name of the SQLite database file.
+            read_only (bool): If True, the file must already contain the players table and is opened read-only.
+                A read-only store may be used by any thread, as long as only one thread uses it at a time.
+        """
+        if read_only:
+            uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(filename))
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.connection = sqlite3.connect(filename)
+            self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get_players(self, min_rating=None):
+        """ Reads every player in the store with a single query.
+
+        Args:
+            min_rating (float): If given, only players with a total rating larger than or equal to ``min_rating``
+                are returned.
+
+        Returns:
+            list(``Player``): The stored players, ordered by id.
+
+        """
+        query = "SELECT first_name, last_name, skating, shooting, checking FROM players"
+        params = ()
+        if min_rating is not None:
+            query += " WHERE total_rating >= ?"
+            params = (min_rating,)
+        query += " ORDER BY id"
+        return [Player(*row) for row in self.connection.execute(query, params)]
+
+    def sync(self, players_by_id):
+        """ Makes the store match ``players_by_id``, writing only the players that changed.
+
+        Args:
+            players_by_id (dict): The up-to-date ``Player`` objects keyed by id.
+
+        Returns:
+            int, int: An (upserted, deleted) tuple with the number of players that were written and removed.
+
+        """
+        stored = dict((row[0], tuple(row[1:])) for row in
+                      self.connection.execute("SELECT id, first_name, last_name, skating, shooting, checking "
+                                              "FROM players"))
+        # ids are stored as TEXT, so compare them as strings
+        players_by_id = dict((str(player_id), player) for (player_id, player) in players_by_id.items())
+        changed = []
+        for (player_id, player) in players_by_id.items():
+            values = (player.first_name, player.last_name, player.skating, player.shooting, player.checking)
+            if stored.get(player_id) != values:
+                changed.append((player_id,) + values + (player.skating + player.shooting + player.checking,))
+        deleted = [(player_id,) for player_id in stored if player_id not in players_by_id]
+
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO players "
+                                        "(id, first_name, last_name, skating, shooting, checking, total_rating) "
+                                        "VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+            self.connection.executemany("DELETE FROM players WHERE id = ?", deleted)
+        return len(changed), len(deleted)
@@ -0,0 +1,445 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Squad Maker web app written with Flask framework.
+
+Functions:
+    create_app: creates the Flask app.
+"""
+
+import click
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from flask import Flask, Response, request, render_template, redirect, url_for, flash, make_response, session, \
+    jsonify, stream_with_context
+from flask.logging import default_handler
+
+from squad_maker_app.concurrency import SingleFlight, ServerBusy
+from squad_maker_app.data_sources import read_players_json
+from squad_maker_app.engines import select_engine, run_engine
+from squad_maker_app.export import iter_csv, iter_ndjson
+from squad_maker_app.log_queue import StructuredFormatter, start_queue_logging, timed
+from squad_maker_app.http_cache import ResponseCache, DEFAULT_CACHE_SIZE, roster_fingerprint, get_template_version, \
+    make_etag, choose_encoding, compress
+from squad_maker_app.precompute import SquadPrecomputer, DEFAULT_TOP_COUNTS, DEFAULT_MAX_RESULTS
+from squad_maker_app.profiling import MemoryProfiler
+from squad_maker_app.roster_store import sync_roster_store
+
+SETTINGS_ENV_VAR = 'SQUAD_MAKER_SETTINGS'
+PLAYER_SOURCE_CONFIG = 'PLAYER_SOURCE'
+ENGINE_RULES_CONFIG = 'SQUAD_ENGINE_RULES'
+ENGINE_DEADLINE_CONFIG = 'SQUAD_ENGINE_DEADLINE'
+ENGINE_FALLBACK_CONFIG = 'SQUAD_ENGINE_FALLBACK'
+PROFILE_MEMORY_CONFIG = 'PROFILE_MEMORY'
+RESPONSE_CACHE_SIZE_CONFIG = 'RESPONSE_CACHE_SIZE'
+COMPRESSION_MIN_BYTES_CONFIG = 'COMPRESSION_MIN_BYTES'
+PRECOMPUTE_SQUAD_COUNTS_CONFIG = 'PRECOMPUTE_SQUAD_COUNTS'
+PRECOMPUTE_MAX_RESULTS_CONFIG = 'PRECOMPUTE_MAX_RESULTS'
+PRECOMPUTER_EXTENSION = 'squad_precomputer'
+MAX_CONCURRENT_BUILDS_CONFIG = 'MAX_CONCURRENT_BUILDS'
+BUSY_RETRY_AFTER_CONFIG = 'BUSY_RETRY_AFTER'
+DEFAULT_MAX_CONCURRENT_BUILDS = 4
+DEFAULT_BUSY_RETRY_AFTER = 1
+NUM_SQUADS_REQUEST_ARG = 'numSquads'
+DEADLINE_REQUEST_ARG = 'deadlineMs'
+LOG_FILE_CONFIG = 'LOG_FILE'
+LOG_FILE = 'instance.log'
+MAX_LOG_FILE_BYTES = 1000000
+MAX_LOG_FILE_BACKUPS = 1
+
+
+def create_app(test_config=None, instance_path=None):
+    app = Flask(__name__, instance_path=instance_path)
+
+    # load default settings, and override with values from a custom config file, if present.
+    app.config.from_object('squad_maker_app.default_settings')
+    app.config.from_envvar(SETTINGS_ENV_VAR, silent=True)
+    if test_config:
+        app.config.from_mapping(test_config)
+
+    # configure logging. Records are queued by the request thread and written to disk by a background thread.
+    log_handler = RotatingFileHandler(app.config.get(LOG_FILE_CONFIG, LOG_FILE), maxBytes=MAX_LOG_FILE_BYTES,
+                                      backupCount=MAX_LOG_FILE_BACKUPS)
+    log_handler.setLevel(logging.DEBUG if app.debug else logging.INFO)
+    log_handler.setFormatter(StructuredFormatter())
+    app.logger.setLevel(logging.DEBUG if app.debug else logging.INFO)
+    # Flask's default handler writes each record to stderr on the request thread
+    app.logger.removeHandler(default_handler)
+    start_queue_logging(app.logger, log_handler)
+
+    # ensure the instance folder exists
+    try:
+        os.makedirs(app.instance_path)
+    except OSError:
+        pass
+
+    response_cache = ResponseCache(app.config.get(RESPONSE_CACHE_SIZE_CONFIG, DEFAULT_CACHE_SIZE))
+    template_version = get_template_version(app)
+    precomputer = SquadPrecomputer(
+        lambda players, num_squads: precompute_squads(players, num_squads),
+        top_counts=app.config.get(PRECOMPUTE_SQUAD_COUNTS_CONFIG, DEFAULT_TOP_COUNTS),
+        max_results=app.config.get(PRECOMPUTE_MAX_RESULTS_CONFIG, DEFAULT_MAX_RESULTS),
+        logger=app.logger)
+    app.extensions[PRECOMPUTER_EXTENSION] = precomputer
+    # concurrent identical requests share one roster fetch and one squad build, and the number of squad builds
+    # running at once is limited
+    single_flight = SingleFlight()
+    build_slots = threading.BoundedSemaphore(app.config.get(MAX_CONCURRENT_BUILDS_CONFIG,
+                                                            DEFAULT_MAX_CONCURRENT_BUILDS))
+
+    @app.route('/')
+    def home():
+        profiler = new_memory_profiler()
+        timings = {}
+        # initially all players are on the waiting list
+        with timed(timings, 'parse'), profiler.stage('parse'):
+            waiting_list = get_all_players()
+        fingerprint = roster_fingerprint(waiting_list)
+        precomputer.roster_seen(fingerprint, waiting_list)
+
+        def render():
+            waiting_list.sort(key=total_rating, reverse=True)
+            with timed(timings, 'render'), profiler.stage('render', roster_size=len(waiting_list)):
+                page = render_template('home.html', waiting_list=waiting_list,
+                                       num_squads_input_name=NUM_SQUADS_REQUEST_ARG)
+            return page, True
+
+        # pages showing a flashed error message are one-offs, so they aren't cached
+        page_id = None if session.get('_flashes') else ['home', fingerprint]
+        response = cached_response(page_id, render)
+        log_request(response, timings, profiler, roster_size=len(waiting_list))
+        return response
+
+    @app.route('/squad-maker')
+    def make_squads():
+        try:
+            profiler = new_memory_profiler()
+            timings = {}
+            (players, num_squads, engine, fingerprint, deadline) = read_squads_request(profiler, timings)
+            labels = {'roster_size': len(players), 'num_squads': num_squads}
+
+            def render():
+                (squads, waiting_list, used_engine) = get_squads(players, num_squads, engine, fingerprint, deadline,
+                                                                 profiler, timings, labels)
+                # log the engine that made the squads, which is the fallback engine if the deadline would be missed
+                labels['engine'] = used_engine
+                with timed(timings, 'render'), profiler.stage('render', **labels):
+                    page = render_template('squads.html', squads=squads, waiting_list=waiting_list)
+                # squads made by the fallback engine depend on timing, so they aren't cached
+                return page, used_engine == engine
+
+            response = cached_response(['squads', fingerprint, num_squads, engine], render)
+            # cached pages were made by the selected engine
+            log_request(response, timings, profiler, **dict({'engine': engine}, **labels))
+            return response
+        except ValueError as e:
+            # A ValueError indicates a problem with one or more of the input arguments. We
+            # want to show these types of errors to the user. All other errors/exceptions should
+            # trigger a 5XX error
+            app.logger.info("Got a ValueError while building squads: %s", e)
+            flash(str(e), 'error')
+            return redirect(url_for('home'))
+
+    @app.route('/export/squads.csv')
+    def export_squads_csv():
+        return export_squads(iter_csv, 'text/csv', 'squads.csv')
+
+    @app.route('/export/squads.ndjson')
+    def export_squads_ndjson():
+        return export_squads(iter_ndjson, 'application/x-ndjson', 'squads.ndjson')
+
+    @app.route('/stats/precompute')
+    def precompute_stats():
+        return jsonify(precomputer.stats())
+
+    @app.errorhandler(404)
+    def handle_page_not_found(e):
+        return render_template('not_found.html')
+
+    @app.errorhandler(ServerBusy)
+    def handle_server_busy(e):
+        retry_after = app.config.get(BUSY_RETRY_AFTER_CONFIG, DEFAULT_BUSY_RETRY_AFTER)
+        app.logger.info("Refused to make squads for %s, the server is busy", request.full_path)
+        return Response("The server is busy making squads, please retry in %d seconds.\n" % retry_after, status=503,
+                        mimetype='text/plain', headers={'Retry-After': str(retry_after)})
+
+    @app.cli.command('sync-roster')
+    @click.argument('source')
+    @click.argument('database')
+    def sync_roster(source, database):
+        """ Syncs the roster store in DATABASE with the player JSON at SOURCE (a REST uri or a local file). """
+        (upserted, deleted) = sync_roster_store(database, read_players_json(source))
+        click.echo("Synced roster store '%s': %d players written, %d players removed" % (database, upserted, deleted))
+
+    def get_all_players():
+        if PLAYER_SOURCE_CONFIG not in app.config:
+            raise Exception("Missing required '%s' configuration variable" % PLAYER_SOURCE_CONFIG)
+
+        def source_players():
+            players = app.config[PLAYER_SOURCE_CONFIG]()
+            app.logger.info("Sourced data for %d players", len(players) if players else 0)
+            return players
+
+        (players, _) = single_flight.do(PLAYER_SOURCE_CONFIG, source_players)
+        # coalesced requests share the list, so each gets its own copy to sort
+        return list(players) if players else players
+
+    def read_squads_request(profiler, timings):
+        """ Reads the arguments of a request for squads, and the players to make them from.
+
+        Returns:
+            list(``Player``), int, str, str, float: A (players, num_squads, engine, fingerprint, deadline) tuple.
+
+        Raises:
+            ValueError: If the request arguments are invalid.
+
+        """
+        num_squads = get_num_squads_from_request(request)
+        timeout = get_deadline_from_request(request, default=app.config.get(ENGINE_DEADLINE_CONFIG))
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with timed(timings, 'parse'), profiler.stage('parse'):
+            players = get_all_players()
+        engine = select_engine(app.config.get(ENGINE_RULES_CONFIG), len(players), num_squads)
+        fingerprint = roster_fingerprint(players)
+        precomputer.record_request(num_squads, len(players))
+        precomputer.roster_seen(fingerprint, players)
+        return players, num_squads, engine, fingerprint, deadline
+
+    def get_squads(players, num_squads, engine, fingerprint, deadline, profiler, timings, labels):
+        """ Returns the precomputed squads for the request, or makes them if they weren't precomputed.
+
+        Returns:
+            list(``Squad``), list(``Player``), str: A (squads, waiting_list, engine) tuple, where engine is the
+            name of the engine that made the squads.
+
+        """
+        result = precomputer.get(fingerprint, num_squads)
+        labels['precomputed'] = result is not None
+        if result is not None:
+            return result
+
+        def build(build_engine=engine):
+            with timed(timings, 'assign'), profiler.stage('assign', **labels):
+                (squads, waiting_list, used_engine) = run_in_build_slot(
+                    lambda: build_squads(players, num_squads, build_engine, deadline))
+            if used_engine != engine:
+                app.logger.info("The '%s' engine would have missed the deadline, fell back to the '%s' engine",
+                                engine, used_engine, extra=dict(labels, engine=used_engine))
+            app.logger.info("Built %d squads from %d players with %d players on the waiting list using the '%s' "
+                            "engine in %.3f seconds", len(squads), len(players), len(waiting_list), used_engine,
+                            timings['assign'], extra=dict(labels, engine=used_engine))
+            if used_engine == engine:
+                # store the squads, so the precomputer doesn't make them again
+                precomputer.put(fingerprint, num_squads, (squads, waiting_list, used_engine), timings['assign'])
+            return squads, waiting_list, used_engine
+
+        fallback = app.config.get(ENGINE_FALLBACK_CONFIG)
+        # a request with a deadline only waits for a shared build, which may have no deadline, until its deadline
+        timeout = max(0.0, deadline - time.monotonic()) if deadline is not None and fallback else None
+        try:
+            (result, labels['coalesced']) = share_build(fingerprint, num_squads, engine, build, timeout)
+        except TimeoutError:
+            labels['coalesced'] = False
+            return build(fallback)
+        if labels['coalesced'] and result[2] != engine:
+            # the shared squads were made by the fallback engine to meet another request's deadline. This request's
+            # deadline may allow the selected engine, so it makes its own squads.
+            result = build()
+            labels['coalesced'] = False
+        return result
+
+    def precompute_squads(players, num_squads):
+        """ Makes squads for the precomputer, sharing the build with any request making the same squads. """
+        engine = select_engine(app.config.get(ENGINE_RULES_CONFIG), len(players), num_squads)
+
+        def build():
+            return run_in_build_slot(lambda: build_squads(players, num_squads, engine))
+
+        (result, _) = share_build(roster_fingerprint(players), num_squads, engine, build)
+        if result[2] != engine:
+            # the squads were shared with a request that fell back to another engine to meet its deadline. Only
+            # squads made by the selected engine may be stored, so make them again.
+            result = build()
+        return result
+
+    def run_in_build_slot(func):
+        """ Calls ``func`` while holding one of the ``MAX_CONCURRENT_BUILDS`` build slots.
+
+        Raises:
+            ServerBusy: If every build slot is in use.
+
+        """
+        if not build_slots.acquire(blocking=False):
+            raise ServerBusy()
+        try:
+            return func()
+        finally:
+            build_slots.release()
+
+    def share_build(fingerprint, num_squads, engine, build, timeout=None):
+        """ Makes squads with ``build``, unless the same squads are already being made or have been stored.
+
+        Requests and the precomputer use the same keys, so concurrent builds of the same squads are shared between
+        them. The store is checked inside the shared call, so a build that starts just after the same squads were
+        stored reads them instead of making them again.
+
+        Args:
+            fingerprint (str): The fingerprint of the roster.
+            num_squads (int): The number of squads to make.
+            engine (str): The name of the selected engine.
+            build (func): Zero-argument function that makes the squads.
+            timeout (float): The number of seconds to wait for a build that is already running, or None to wait
+                for as long as it takes.
+
+        Returns:
+            tuple, bool: A ((squads, waiting_list, engine), shared) tuple, where shared is True if the squads were
+            made by another caller.
+
+        Raises:
+            TimeoutError: If a build that is already running doesn't finish within ``timeout`` seconds.
+
+        """
+        def build_once():
+            stored = precomputer.peek(fingerprint, num_squads)
+            return stored if stored is not None else build()
+        return single_flight.do((fingerprint, num_squads, engine), build_once, timeout)
+
+    def export_squads(iter_export, mimetype, filename):
+        """ Streams the squads for the request one row at a time, in the format produced by ``iter_export``. """
+        try:
+            profiler = new_memory_profiler()
+            timings = {}
+            (players, num_squads, engine, fingerprint, deadline) = read_squads_request(profiler, timings)
+            labels = {'roster_size': len(players), 'num_squads': num_squads}
+            (squads, waiting_list, used_engine) = get_squads(players, num_squads, engine, fingerprint, deadline,
+                                                             profiler, timings, labels)
+        except ValueError as e:
+            # the export is read by other systems rather than people, so report bad arguments with a 400 status
+            app.logger.info("Got a ValueError while exporting squads: %s", e)
+            return Response(str(e) + '\n', status=400, mimetype='text/plain')
+
+        response = Response(stream_with_context(iter_export(squads, waiting_list)), mimetype=mimetype)
+        response.headers['Content-Disposition'] = 'attachment; filename=%s' % filename
+        # exports aren't cached
+        log_request(response, timings, profiler, engine=used_engine, cache=None, **labels)
+        return response
+
+    def build_squads(players, num_squads, engine, deadline=None):
+        """ Makes squads with ``engine``, and sorts each squad and the waiting list by total rating.
+
+        Returns:
+            list(``Squad``), list(``Player``), str: A (squads, waiting_list, engine) tuple, where engine is the
+            name of the engine that made the squads.
+
+        """
+        (squads, waiting_list, used_engine) = run_engine(engine, num_squads, players, deadline=deadline,
+                                                         fallback=app.config.get(ENGINE_FALLBACK_CONFIG))
+        for squad in squads:
+            squad.players.sort(key=total_rating, reverse=True)
+        waiting_list.sort(key=total_rating, reverse=True)
+        return squads, waiting_list, used_engine
+
+    def cached_response(page_id, render):
+        """ Returns the page identified by ``page_id``, using a conditional or cached response where possible.
+
+        Args:
+            page_id (list): Values that together identify the content of the page, or None if the page must not
+                be cached.
+            render (func): Zero-argument function that returns a (page, cacheable) tuple, where cacheable is False
+                if this particular rendering of the page must not be cached.
+
+        Returns:
+            ``Response``: A 304 response if the client's copy is current, otherwise the (compressed) page.
+
+        """
+        encoding = choose_encoding(request.accept_encodings)
+        if page_id is None:
+            (page, _) = render()
+            return encoded_response(*encode_page(page, encoding))
+
+        etag = make_etag(page_id + [template_version], encoding)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.vary.add('Accept-Encoding')
+        else:
+            cached = response_cache.get(etag)
+            if cached is None:
+                (page, cacheable) = render()
+                cached = encode_page(page, encoding)
+                if not cacheable:
+                    return encoded_response(*cached)
+                response_cache.put(etag, cached)
+            response = encoded_response(*cached)
+        response.set_etag(etag)
+        return response
+
+    def encode_page(page, encoding):
+        # small pages aren't worth compressing
+        body = page.encode('utf-8')
+        if encoding is None or len(body) < app.config.get(COMPRESSION_MIN_BYTES_CONFIG, 0):
+            return body, None
+        return compress(body, encoding), encoding
+
+    def encoded_response(body, encoding):
+        response = make_response(body)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def new_memory_profiler():
+        return MemoryProfiler(enabled=app.config.get(PROFILE_MEMORY_CONFIG, False))
+
+    def log_request(response, timings, profiler, **labels):
+        """ Logs a structured record of the request's stage timings, and its memory profile if enabled. """
+        # pages served from the cache, or not modified, skip the assign and render stages
+        cache = 'miss' if 'render' in timings else 'hit'
+        extra = {'path': request.full_path, 'cache': cache, 'timings': timings}
+        extra.update(labels)
+        if profiler.enabled:
+            extra['memory_profile'] = profiler.to_dict()
+        app.logger.info("Served %s with status %d", request.full_path, response.status_code, extra=extra)
+
+    def total_rating(player):
+        """ Sort players by cumulative skill rating """
+        return player.skating + player.shooting + player.checking
+
+    return app
+
+
+def get_num_squads_from_request(request):
+    value = request.args.get(NUM_SQUADS_REQUEST_ARG, '')
+
+    if value in ['', None]:
+        raise ValueError("You must enter the number of squads to make.")
+
+    try:
+        num_squads = int(value)
+    except ValueError:
+        raise ValueError("'%s' is not a valid number of squads." % value)
+
+    if num_squads == 0:
+        raise ValueError("You must build at least one squad.")
+
+    if num_squads < 0:
+        raise ValueError("You cannot build a negative number of squads.")
+    return num_squads
+
+
+def get_deadline_from_request(request, default=None):
+    """ Returns the number of seconds the request may take to make squads, or ``default`` if it doesn't say. """
+    value = request.args.get(DEADLINE_REQUEST_ARG, '')
+
+    if value in ['', None]:
+        return default
+
+    try:
+        deadline_ms = float(value)
+    except ValueError:
+        raise ValueError("'%s' is not a valid deadline." % value)
+
+    if deadline_ms <= 0:
+        raise ValueError("The deadline must be larger than zero.")
+    return deadline_ms / 1000
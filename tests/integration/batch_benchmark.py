@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# Copyright 2018 Rhyan Arthur
+
+""" Benchmarks how batch squad making scales with the number of worker processes. """
+
+import argparse
+import os
+import time
+from squad_maker_app.algorithms import make_squads_minimize_cumulative_delta_mean
+from squad_maker_app.batch import make_squads_batch
+from squad_maker_app.data_sources import generate_players
+
+DEFAULT_NUM_LEAGUES = 48
+DEFAULT_PLAYERS_PER_LEAGUE = 120
+DEFAULT_NUM_SQUADS = 6
+
+
+def get_process_counts():
+    # double the number of processes until every CPU is in use
+    counts = []
+    n = 1
+    while n < os.cpu_count():
+        counts.append(n)
+        n *= 2
+    counts.append(os.cpu_count())
+    return counts
+
+
+def run_serial(jobs):
+    start = time.time()
+    for (players, num_squads) in jobs:
+        make_squads_minimize_cumulative_delta_mean(num_squads, players)
+    return time.time() - start
+
+
+def run_batch(jobs, processes, chunksize):
+    start = time.time()
+    results = list(make_squads_batch(jobs, processes=processes, chunksize=chunksize))
+    assert len(results) == len(jobs)
+    return time.time() - start
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--leagues', type=int, default=DEFAULT_NUM_LEAGUES, help="The number of leagues.")
+    parser.add_argument('--players', type=int, default=DEFAULT_PLAYERS_PER_LEAGUE,
+                        help="The number of players in each league.")
+    parser.add_argument('--num-squads', type=int, default=DEFAULT_NUM_SQUADS,
+                        help="The number of squads to make in each league.")
+    parser.add_argument('--chunksize', type=int, default=1, help="The number of jobs sent to a worker at a time.")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    jobs = [(generate_players(args.players), args.num_squads) for _ in range(args.leagues)]
+
+    serial_time = run_serial(jobs)
+    print("Made squads for %d leagues of %d players serially in %f seconds"
+          % (args.leagues, args.players, serial_time))
+    for processes in get_process_counts():
+        batch_time = run_batch(jobs, processes, args.chunksize)
+        speedup = serial_time / batch_time
+        print("processes=%-3d %f seconds  speedup=%.2fx  efficiency=%.0f%%"
+              % (processes, batch_time, speedup, 100 * speedup / processes))
@@ -1,14 +1,27 @@
 #!/usr/bin/env python
 # Copyright 2018 Rhyan Arthur
 
-""" Benchmarks the squad maker algorithm by measuring squad skill variance for a number of generated data sets. """
+""" Benchmarks the squad maker algorithm by measuring squad skill variance for a number of generated data sets.
 
+With --memory-profile the benchmark instead measures the peak memory, and the memory and blocks retained, by each
+stage of making squads (parse, decorate, assign, render) for a number of roster sizes, using tracemalloc. The
+results are printed and can be written to a JSON file with --output, to compare releases.
+"""
+
+import argparse
 import time
 from math import floor
-from squad_maker_app.data_sources import get_generated_data_source
-from squad_maker_app.algorithms import make_random_squads, make_squads_minimize_cumulative_delta_mean
+from flask import render_template
+from squad_maker_app.web import create_app
+from squad_maker_app.data_sources import get_generated_data_source, generate_players, players_to_json, \
+    parse_players_json
+from squad_maker_app.algorithms import make_random_squads, make_squads_minimize_cumulative_delta_mean, \
+    _decorate_players_with_delta_mean_data
+from squad_maker_app.profiling import MemoryProfiler
 
 BENCHMARK_ALGORITHM = make_random_squads
+DEFAULT_MEMORY_PROFILE_SIZES = [100, 200, 400, 800]
+DEFAULT_MEMORY_PROFILE_NUM_SQUADS = 4
 
 
 class Experiment:
@@ -49,7 +62,7 @@ def get_data_sources():
     return [get_generated_data_source(i) for i in [20,30,40,50,60,70,80,90,100]]
 
 
-if __name__ == '__main__':
+def run_variance_benchmark():
     experiments = []
 
     for player_source in get_data_sources():
@@ -72,4 +85,52 @@ if __name__ == '__main__':
     print("Ran %d experiments in %f seconds" % (num_experiments, end - start))
     print("Average benchmark variance: %f" % benchmark_variance)
     print("Average variance for '%s' algorithm: %f" % (make_squads_minimize_cumulative_delta_mean.__name__,
-                                                       test_variance))
\ No newline at end of file
+                                                       test_variance))
+
+
+def run_memory_profile(sizes, num_squads):
+    profiler = MemoryProfiler()
+    app = create_app()
+    with app.test_request_context():
+        # compile the template up front, so it isn't counted in the first render stage
+        render_template('squads.html', squads=[], waiting_list=[])
+
+    for size in sizes:
+        json_str = players_to_json(generate_players(size))
+        with profiler.stage('parse', roster_size=size):
+            players = parse_players_json(json_str)
+        with profiler.stage('decorate', roster_size=size):
+            _decorate_players_with_delta_mean_data(players)
+        with profiler.stage('assign', roster_size=size, num_squads=num_squads):
+            (squads, waiting_list) = make_squads_minimize_cumulative_delta_mean(num_squads, players)
+        with app.test_request_context():
+            with profiler.stage('render', roster_size=size, num_squads=num_squads):
+                render_template('squads.html', squads=squads, waiting_list=waiting_list)
+
+    for stage in profiler.stages:
+        print("%-8s players=%-5d peak=%10d bytes  retained=%10d bytes  retained_blocks=%d"
+              % (stage['stage'], stage['roster_size'], stage['peak_bytes'], stage['retained_bytes'],
+                 stage['retained_blocks']))
+    return profiler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--memory-profile', action='store_true',
+                        help="Profile the memory used by each stage instead of measuring squad variance.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_MEMORY_PROFILE_SIZES,
+                        help="The roster sizes to profile.")
+    parser.add_argument('--num-squads', type=int, default=DEFAULT_MEMORY_PROFILE_NUM_SQUADS,
+                        help="The number of squads to make while profiling.")
+    parser.add_argument('--output', help="Write the memory profile to this JSON file.")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.memory_profile:
+        profile = run_memory_profile(args.sizes, args.num_squads)
+        if args.output:
+            profile.write_json(args.output)
+    else:
+        run_variance_benchmark()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# Copyright 2018 Rhyan Arthur
+
+""" Load tests the squad maker web app against a local stand-in for the player REST API.
+
+The harness is made of three parts, all of which run locally so no network access is required:
+    1. A stand-in roster server that serves generated player JSON with a configurable latency and roster size.
+    2. A squad maker app instance whose PLAYER_SOURCE points at the stand-in roster server.
+    3. A concurrent client that hits '/' and '/squad-maker' and records the latency of each request.
+
+Throughput and p50/p95/p99 latencies are reported for every combination of roster size and concurrency level.
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from math import ceil
+from socketserver import ThreadingMixIn
+
+import requests
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+from squad_maker_app.web import create_app, PLAYER_SOURCE_CONFIG, NUM_SQUADS_REQUEST_ARG
+from squad_maker_app.data_sources import generate_players, get_rest_data_source, players_to_json
+
+HOST = '127.0.0.1'
+DEFAULT_ROSTER_SIZES = [50, 100, 200]
+DEFAULT_CONCURRENCY_LEVELS = [1, 4, 16]
+DEFAULT_REQUESTS_PER_LEVEL = 48
+DEFAULT_NUM_SQUADS = 4
+DEFAULT_ROSTER_LATENCY_MS = 20
+PERCENTILES = [50, 95, 99]
+
+
+class RosterServer:
+    """ A local stand-in for the player REST API.
+
+    Serves generated rosters at ``/players/<size>``. Each roster is generated once per size and then served
+    unchanged, after sleeping for ``latency`` seconds to simulate a slow upstream API.
+    """
+
+    def __init__(self, latency=0):
+        """ Creates a roster server that listens on an unused local port.
+
+        Args:
+            latency (float): The number of seconds to wait before responding to each request.
+        """
+        self.latency = latency
+        self._rosters = {}
+        self._rosters_lock = threading.Lock()
+        self._server = _ThreadingHTTPServer((HOST, 0), _make_roster_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url_for(self, size):
+        """ Returns the uri that serves a roster of ``size`` players. """
+        return "http://%s:%d/players/%d" % (HOST, self._server.server_port, size)
+
+    def get_roster_json(self, size):
+        with self._rosters_lock:
+            if size not in self._rosters:
+                self._rosters[size] = players_to_json(generate_players(size)).encode('utf-8')
+            return self._rosters[size]
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _make_roster_handler(roster_server):
+
+    class RosterRequestHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            try:
+                size = int(self.path.rstrip('/').split('/')[-1])
+            except ValueError:
+                self.send_error(404)
+                return
+            body = roster_server.get_roster_json(size)
+            time.sleep(roster_server.latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # keep the load test output readable
+            pass
+
+    return RosterRequestHandler
+
+
+class _QuietWSGIRequestHandler(WSGIRequestHandler):
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class AppServer:
+    """ Serves a squad maker app instance on an unused local port, in a background thread. """
+
+    def __init__(self, app):
+        self.app = app
+        self._server = make_server(HOST, 0, app, threaded=True, request_handler=_QuietWSGIRequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def url(self):
+        return "http://%s:%d" % (HOST, self._server.server_port)
+
+
+class LoadResult:
+    """ The latencies recorded while running a single load level against a single page. """
+
+    def __init__(self, page, roster_size, concurrency, latencies, errors, elapsed):
+        self.page = page
+        self.roster_size = roster_size
+        self.concurrency = concurrency
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0
+
+    def percentile(self, p):
+        return get_percentile(self.latencies, p)
+
+    def __str__(self):
+        percentiles = " ".join(["p%d=%7.1fms" % (p, self.percentile(p) * 1000) for p in PERCENTILES])
+        return "%-12s players=%-5d concurrency=%-3d %8.1f req/s %s errors=%d" \
+               % (self.page, self.roster_size, self.concurrency, self.throughput, percentiles, self.errors)
+
+
+def get_percentile(sorted_values, p):
+    """ Returns the ``p``-th percentile of ``sorted_values`` using the nearest-rank method. """
+    if not sorted_values:
+        return float('nan')
+    rank = max(1, ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_load(url, num_requests, concurrency):
+    """ Sends ``num_requests`` GET requests to ``url`` from ``concurrency`` client threads.
+
+    Returns:
+        list(float), int, float: A (latencies, errors, elapsed) tuple.
+
+    """
+    local = threading.local()
+
+    def send_request(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        response = local.session.get(url, allow_redirects=False)
+        latency = time.perf_counter() - start
+        return latency, response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send_request, range(num_requests)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for (latency, ok) in results if ok]
+    return latencies, len(results) - len(latencies), elapsed
+
+
+def run_load_tests(roster_sizes, concurrency_levels, num_requests, num_squads, roster_latency):
+    roster_server = RosterServer(latency=roster_latency).start()
+    app = create_app()
+    app_server = AppServer(app).start()
+    pages = [('/', app_server.url + '/'),
+             ('/squad-maker', "%s/squad-maker?%s=%d" % (app_server.url, NUM_SQUADS_REQUEST_ARG, num_squads))]
+    try:
+        for roster_size in roster_sizes:
+            app.config[PLAYER_SOURCE_CONFIG] = get_rest_data_source(roster_server.url_for(roster_size))
+            for (page, url) in pages:
+                # warm up connections and the roster server's cache before measuring
+                run_load(url, num_requests=1, concurrency=1)
+                for concurrency in concurrency_levels:
+                    (latencies, errors, elapsed) = run_load(url, num_requests, concurrency)
+                    yield LoadResult(page, roster_size, concurrency, latencies, errors, elapsed)
+    finally:
+        app_server.stop()
+        roster_server.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--roster-sizes', type=int, nargs='+', default=DEFAULT_ROSTER_SIZES,
+                        help="The roster sizes served by the stand-in roster server.")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY_LEVELS,
+                        help="The number of concurrent client threads for each load level.")
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS_PER_LEVEL,
+                        help="The number of requests sent at each load level.")
+    parser.add_argument('--num-squads', type=int, default=DEFAULT_NUM_SQUADS,
+                        help="The number of squads requested from '/squad-maker'.")
+    parser.add_argument('--roster-latency-ms', type=float, default=DEFAULT_ROSTER_LATENCY_MS,
+                        help="The latency added to every response from the stand-in roster server.")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start = time.time()
+    results = run_load_tests(args.roster_sizes, args.concurrency, args.requests, args.num_squads,
+                             args.roster_latency_ms / 1000)
+    for result in results:
+        print(result)
+    print("Finished load test in %f seconds" % (time.time() - start))
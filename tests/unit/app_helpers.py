@@ -0,0 +1,34 @@
+# Copyright 2018 Rhyan Arthur
+
+""" Contains helpers for the tests of the web app.
+
+Functions:
+    create_test_app: creates the web app with its log file and instance folder in a temporary directory.
+"""
+
+import os
+import tempfile
+
+from squad_maker_app.log_queue import stop_queue_logging
+from squad_maker_app.web import create_app, LOG_FILE_CONFIG
+
+
+def create_test_app(testcase, **config):
+    """ Creates the web app for a test, keeping its log file and instance folder out of the working directory.
+
+    The temporary directory is removed, and the app's log queue stopped, when the test finishes.
+
+    Args:
+        testcase (``unittest.TestCase``): The test the app is created for.
+        **config: Settings that override the default settings.
+
+    Returns:
+        ``Flask``: The app. Its log file is ``app.config[LOG_FILE_CONFIG]``.
+
+    """
+    log_dir = tempfile.TemporaryDirectory()
+    testcase.addCleanup(log_dir.cleanup)
+    config.setdefault(LOG_FILE_CONFIG, os.path.join(log_dir.name, 'instance.log'))
+    app = create_app(config, instance_path=log_dir.name)
+    testcase.addCleanup(stop_queue_logging, app.logger)
+    return app
@@ -1,15 +1,16 @@
 # Copyright 2018 Rhyan Arthuri
 
+import time
 import unittest
 from squad_maker_app.models import Player, Squad
 from squad_maker_app.algorithms import make_random_squads, make_squads_minimize_cumulative_delta_mean, DeltaMeanPlayerDecorator, \
-    DeltaMeanSquadDecorator
+    DeltaMeanSquadDecorator, make_squads_snake_draft, DeadlineExceeded
 from squad_maker_app.data_sources import generate_players
 
 
 class TestSquadMaker(unittest.TestCase):
 
-    ALGORITHMS = [make_random_squads, make_squads_minimize_cumulative_delta_mean]
+    ALGORITHMS = [make_random_squads, make_squads_minimize_cumulative_delta_mean, make_squads_snake_draft]
 
     def test_zero_squads_error(self):
         for algorithm in self.ALGORITHMS:
@@ -59,6 +60,46 @@ class TestSquadMaker(unittest.TestCase):
                 self.assertEqual(2, len(waiting_list))
 
 
+class TestDeadline(unittest.TestCase):
+
+    def test_missed_deadline(self):
+        players = generate_players(40)
+        with self.assertRaises(DeadlineExceeded):
+            make_squads_minimize_cumulative_delta_mean(4, players, deadline=time.monotonic() - 1)
+
+    def test_missed_deadline_with_many_squads(self):
+        # with half as many squads as players the squads are assigned in a single round
+        players = generate_players(600)
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            make_squads_minimize_cumulative_delta_mean(300, players, deadline=start + 0.01)
+        # abandoned after the first few picks, rather than after the round
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_met_deadline(self):
+        players = generate_players(40)
+        (squads, waiting_list) = make_squads_minimize_cumulative_delta_mean(4, players,
+                                                                            deadline=time.monotonic() + 60)
+        self.assertEqual(4, len(squads))
+        self.assertEqual(0, len(waiting_list))
+
+
+class TestSnakeDraft(unittest.TestCase):
+
+    def test_snake_order(self):
+        players = [Player('p%d' % rating, '', skating=rating, shooting=0, checking=0) for rating in range(6)]
+        (squads, waiting_list) = make_squads_snake_draft(2, players)
+        self.assertEqual(0, len(waiting_list))
+        self.assertEqual(['p5', 'p2', 'p1'], [p.first_name for p in squads[0].players])
+        self.assertEqual(['p4', 'p3', 'p0'], [p.first_name for p in squads[1].players])
+
+    def test_outliers_on_waiting_list(self):
+        players = [Player('average%d' % i, '', skating=50, shooting=50, checking=50) for i in range(4)]
+        players.append(Player('outlier', '', skating=100, shooting=0, checking=100))
+        (squads, waiting_list) = make_squads_snake_draft(2, players)
+        self.assertEqual(['outlier'], [p.first_name for p in waiting_list])
+
+
 class TestDeltaMeanDecorators(unittest.TestCase):
 
     def test_get_decorated_player_attributes(self):
@@ -0,0 +1,70 @@
+# Copyright 2018 Rhyan Arthur
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from squad_maker_app.algorithms import make_random_squads
+from squad_maker_app.batch import make_squads_batch, main
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.models import Player, Squad
+
+STATIC_PLAYERS_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'squad_maker_app', 'static',
+                                   'players.json')
+
+
+class TestMakeSquadsBatch(unittest.TestCase):
+
+    def test_every_job_has_a_result(self):
+        jobs = [(generate_players(10 + i), 2 + i % 3) for i in range(8)]
+        results = sorted(make_squads_batch(jobs, processes=2, chunksize=3), key=lambda r: r.index)
+        self.assertEqual(list(range(8)), [r.index for r in results])
+        for (result, (players, num_squads)) in zip(results, jobs):
+            self.assertIsNone(result.error)
+            self.assertEqual(num_squads, len(result.squads))
+            self.assertEqual(len(players), sum(len(s.players) for s in result.squads) + len(result.waiting_list))
+
+    def test_results_are_plain_models(self):
+        (result,) = make_squads_batch([(generate_players(9), 2)], processes=1)
+        for squad in result.squads:
+            self.assertIs(Squad, type(squad))
+            for player in squad.players:
+                self.assertIs(Player, type(player))
+        for player in result.waiting_list:
+            self.assertIs(Player, type(player))
+
+    def test_invalid_job_does_not_stop_batch(self):
+        jobs = [(generate_players(2), 5), (generate_players(10), 2)]
+        results = sorted(make_squads_batch(jobs, algorithm=make_random_squads, processes=2), key=lambda r: r.index)
+        self.assertIsNotNone(results[0].error)
+        self.assertIsNone(results[1].error)
+        self.assertEqual(2, len(results[1].squads))
+
+
+class TestBatchCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_writes_json_lines(self):
+        jobs_file = os.path.join(self.dir, 'jobs.json')
+        with open(jobs_file, 'w') as f:
+            json.dump([{'roster': STATIC_PLAYERS_FILE, 'numSquads': n} for n in [2, 3, 4]], f)
+        output = StringIO()
+        with redirect_stdout(output):
+            main([jobs_file, '--processes', '2'])
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([0, 1, 2], sorted(r['job'] for r in results))
+        for result in results:
+            self.assertEqual(result['job'] + 2, len(result['squads']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# Copyright 2018 Rhyan Arthur
+
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, Mock
+
+import requests
+
+from squad_maker_app.cli import main
+from squad_maker_app.data_sources import generate_players, players_to_json
+from squad_maker_app.export import COLUMNS, SQUAD_COLUMN
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.players_json = players_to_json(generate_players(20))
+
+    def run_cli(self, args, stdin=''):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        main(args, stdin=io.StringIO(stdin), stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            roster = os.path.join(directory, 'players.json')
+            with open(roster, 'w') as f:
+                f.write(self.players_json)
+            (out, err) = self.run_cli([roster, '--num-squads', '3'])
+        rows = list(csv.DictReader(io.StringIO(out)))
+        self.assertEqual(20, len(rows))
+        self.assertEqual(COLUMNS, list(rows[0].keys()))
+        self.assertEqual(18, len([r for r in rows if r[SQUAD_COLUMN]]))
+        self.assertIn("Made 3 squads from 20 players with 2 players on the waiting list using the 'delta-mean' engine",
+                      err)
+
+    def test_json_from_stdin(self):
+        (out, err) = self.run_cli(['-', '--num-squads', '4', '--engine', 'snake-draft', '--format', 'json'],
+                                  stdin=self.players_json)
+        rows = json.loads(out)
+        self.assertEqual(20, len(rows))
+        self.assertEqual({1, 2, 3, 4}, set(r[SQUAD_COLUMN] for r in rows))
+        self.assertIn("'snake-draft' engine", err)
+
+    def test_ndjson_from_generated_roster(self):
+        (out, _) = self.run_cli(['--generate', '12', '--num-squads', '2', '--format', 'ndjson'])
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(12, len(rows))
+
+    def test_too_many_squads(self):
+        with self.assertRaises(SystemExit):
+            self.run_cli(['--generate', '5', '--num-squads', '6'])
+
+    def test_missing_roster_file(self):
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit) as raised:
+                self.run_cli(['nonexistent.json', '--num-squads', '2'])
+        self.assertEqual(2, raised.exception.code)
+        self.assertIn("Failed to read the roster 'nonexistent.json'", stderr.getvalue())
+        self.assertNotIn("Traceback", stderr.getvalue())
+
+    def test_bad_roster_json(self):
+        for bad_json in ['not json', json.dumps({'players': [{'_id': '1', 'firstName': 'No skills'}]})]:
+            with self.subTest(bad_json=bad_json), patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                with self.assertRaises(SystemExit):
+                    self.run_cli(['-', '--num-squads', '2'], stdin=bad_json)
+                self.assertIn("Failed to read the roster '-'", stderr.getvalue())
+
+    def test_unreachable_roster_uri(self):
+        with patch('requests.get', side_effect=requests.ConnectionError("connection refused")), \
+                patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit):
+                self.run_cli(['http://localhost:1/players', '--num-squads', '2'])
+        self.assertIn("connection refused", stderr.getvalue())
+
+    def test_broken_pipe_leaves_sys_stdout_alone(self):
+        stdout = Mock()
+        stdout.write.side_effect = BrokenPipeError()
+        real_stdout = sys.stdout
+        main(['--generate', '4', '--num-squads', '2'], stdout=stdout, stderr=io.StringIO())
+        self.assertIs(real_stdout, sys.stdout)
+
+    def test_roster_required(self):
+        with self.assertRaises(SystemExit):
+            self.run_cli(['--num-squads', '2'])
+
+    def test_does_not_import_flask(self):
+        code = "import sys, squad_maker_app.cli; print('flask' in sys.modules)"
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        self.assertEqual(b'False', output.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
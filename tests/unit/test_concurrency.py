@@ -0,0 +1,222 @@
+# Copyright 2018 Rhyan Arthur
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from squad_maker_app.concurrency import SingleFlight
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.engines import run_engine
+from squad_maker_app.http_cache import roster_fingerprint
+from squad_maker_app.web import PLAYER_SOURCE_CONFIG, PRECOMPUTER_EXTENSION
+
+from app_helpers import create_test_app
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def slow_call(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return 'result'
+
+    def test_concurrent_calls_share_result(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.single_flight.do('key', self.slow_call)))
+                   for _ in range(5)]
+        threads[0].start()
+        self.started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        # give the followers time to start waiting on the leader
+        time.sleep(0.1)
+        self.release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(1, self.calls)
+        self.assertEqual(['result'] * 5, [r for (r, _) in results])
+        self.assertEqual([False, True, True, True, True], sorted(shared for (_, shared) in results))
+
+    def test_error_shared(self):
+        def fail():
+            self.started.set()
+            self.release.wait(5)
+            raise ValueError("failed")
+
+        errors = []
+
+        def call():
+            try:
+                self.single_flight.do('key', fail)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        self.started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        time.sleep(0.1)
+        self.release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(3, len(errors))
+
+    def test_key_forgotten_after_call(self):
+        self.release.set()
+        self.assertEqual(('result', False), self.single_flight.do('key', self.slow_call))
+        self.assertEqual(('result', False), self.single_flight.do('key', self.slow_call))
+        self.assertEqual(2, self.calls)
+
+    def test_follower_timeout(self):
+        leader = threading.Thread(target=lambda: self.single_flight.do('key', self.slow_call))
+        leader.start()
+        self.started.wait(5)
+        with self.assertRaises(TimeoutError):
+            self.single_flight.do('key', self.slow_call, timeout=0.05)
+        # the call carries on for the leader
+        self.release.set()
+        leader.join()
+        self.assertEqual(1, self.calls)
+
+
+class TestConcurrencyInApp(unittest.TestCase):
+
+    def setUp(self):
+        self.players = generate_players(40)
+        self.roster_fetches = 0
+        self.fetch_seconds = 0.2
+        self.engines = []
+        self.building = threading.Event()
+        self.lock = threading.Lock()
+        patcher = patch('squad_maker_app.web.run_engine', side_effect=self.slow_run_engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_app(self, **config):
+        app = create_test_app(self, **config)
+        app.config[PLAYER_SOURCE_CONFIG] = self.slow_player_source
+        return app
+
+    def slow_player_source(self):
+        with self.lock:
+            self.roster_fetches += 1
+        time.sleep(self.fetch_seconds)
+        return list(self.players)
+
+    def slow_run_engine(self, name, num_squads, players, deadline=None, fallback=None):
+        self.building.set()
+        time.sleep(0.2)
+        if deadline is not None and deadline - time.monotonic() < 1:
+            # stands in for an engine that would miss a tight deadline
+            name = fallback
+        with self.lock:
+            self.engines.append(name)
+        return run_engine(name, num_squads, players)
+
+    def get_concurrently(self, app, urls):
+        barrier = threading.Barrier(len(urls))
+        responses = [None] * len(urls)
+
+        def get(i):
+            client = app.test_client()
+            barrier.wait()
+            responses[i] = client.get(urls[i])
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(len(urls))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return responses
+
+    def change_roster(self, app):
+        """ Makes the app precompute 4 squads for the next roster, and changes the roster. """
+        app.test_client().get('/squad-maker?numSquads=4')
+        app.extensions[PRECOMPUTER_EXTENSION].wait()
+        self.players = generate_players(40)
+        self.roster_fetches = 0
+        self.engines = []
+        self.building.clear()
+
+    def test_identical_requests_share_one_computation(self):
+        app = self.create_app()
+        self.change_roster(app)
+        # the requests see the new roster, which also starts precomputing the same squads in the background
+        responses = self.get_concurrently(app, ['/squad-maker?numSquads=4'] * 8)
+        app.extensions[PRECOMPUTER_EXTENSION].wait()
+        self.assertEqual(1, self.roster_fetches)
+        self.assertEqual(['delta-mean'], self.engines)
+        self.assertEqual([200] * 8, [r.status_code for r in responses])
+        self.assertEqual(1, len(set(r.data for r in responses)))
+
+    def test_fallback_squads_not_shared(self):
+        app = self.create_app(PRECOMPUTE_SQUAD_COUNTS=0)
+        client = app.test_client()
+        tight = threading.Thread(target=lambda: client.get('/squad-maker?numSquads=4&deadlineMs=5'))
+        tight.start()
+        self.building.wait(5)
+        # this request's deadline allows the selected engine, so it doesn't share the fallback squads
+        response = app.test_client().get('/squad-maker?numSquads=4')
+        tight.join()
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(['snake-draft', 'delta-mean'], self.engines)
+
+    def test_precomputer_stores_selected_engine(self):
+        app = self.create_app()
+        self.change_roster(app)
+        self.fetch_seconds = 0
+        # the request falls back to meet its deadline while the new roster is precomputed, and either may lead the
+        # shared build
+        response = app.test_client().get('/squad-maker?numSquads=4&deadlineMs=5')
+        precomputer = app.extensions[PRECOMPUTER_EXTENSION]
+        precomputer.wait()
+        self.assertEqual(200, response.status_code)
+        self.assertIn('snake-draft', self.engines)
+        (_, _, engine) = precomputer.peek(roster_fingerprint(self.players), 4)
+        self.assertEqual('delta-mean', engine)
+
+    def test_follower_falls_back_at_deadline(self):
+        app = self.create_app()
+        self.change_roster(app)
+        self.fetch_seconds = 0
+        # the new roster starts precomputing 4 squads without a deadline
+        app.test_client().get('/')
+        self.building.wait(5)
+        response = app.test_client().get('/squad-maker?numSquads=4&deadlineMs=100')
+        app.extensions[PRECOMPUTER_EXTENSION].wait()
+        self.assertEqual(200, response.status_code)
+        # the request stopped waiting for the precomputed squads at its deadline and used the fallback engine
+        self.assertEqual(['delta-mean', 'snake-draft'], sorted(self.engines))
+
+    def test_busy_when_saturated(self):
+        app = self.create_app(MAX_CONCURRENT_BUILDS=1, BUSY_RETRY_AFTER=3, PRECOMPUTE_SQUAD_COUNTS=0)
+        responses = self.get_concurrently(app, ['/squad-maker?numSquads=4', '/squad-maker?numSquads=5'])
+        self.assertEqual([200, 503], sorted(r.status_code for r in responses))
+        busy = [r for r in responses if r.status_code == 503][0]
+        self.assertEqual('3', busy.headers['Retry-After'])
+        self.assertEqual(1, len(self.engines))
+
+    def test_precompute_uses_build_slot(self):
+        app = self.create_app(MAX_CONCURRENT_BUILDS=1)
+        self.change_roster(app)
+        self.fetch_seconds = 0
+        # the new roster starts precomputing 4 squads, which takes the only build slot
+        app.test_client().get('/')
+        self.building.wait(5)
+        response = app.test_client().get('/squad-maker?numSquads=5')
+        self.assertEqual(503, response.status_code)
+        app.extensions[PRECOMPUTER_EXTENSION].wait()
+        self.assertEqual(['delta-mean'], self.engines)
+
+
+if __name__ == '__main__':
+    unittest.main()
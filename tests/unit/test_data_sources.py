@@ -4,30 +4,30 @@ import json
 import unittest
 from unittest.mock import patch, Mock
 
-from squad_maker_app.data_sources import parse_players_json, PLAYERS_KEY, SKILLS_KEY, SKILL_TYPE_KEY, \
-    SKILL_RATING_KEY, SKATING_SKILL, SHOOTING_SKILL, CHECKING_SKILL, ID_KEY, FIRST_NAME_KEY, LAST_NAME_KEY, \
-    generate_players, get_rest_data_source
+from squad_maker_app.data_sources import parse_players_json, parse_players_json_by_id, PLAYERS_KEY, SKILLS_KEY, \
+    SKILL_TYPE_KEY, SKILL_RATING_KEY, SKATING_SKILL, SHOOTING_SKILL, CHECKING_SKILL, ID_KEY, FIRST_NAME_KEY, \
+    LAST_NAME_KEY, generate_players, get_rest_data_source, players_to_json
 
 
-@patch('squad_maker_app.data_sources.requests')
+@patch('requests.get')
 class TestRestDataSource(unittest.TestCase):
 
-    def test_happy_path(self, mock_requests):
+    def test_happy_path(self, mock_get):
         response_text = get_generated_json_str(num_players=10)
         mock_response = Mock()
         mock_response.text = response_text
-        mock_requests.get = Mock(return_value=mock_response)
+        mock_get.return_value = mock_response
         uri = "http:hostname/path/to/endpoint/"
 
         player_supplier = get_rest_data_source(uri)
         players = player_supplier()
         self.assertEquals(10, len(players))
-        mock_requests.get.assert_called_with(uri)
+        mock_get.assert_called_with(uri)
 
-    def test_failed_request(self, mock_requests):
+    def test_failed_request(self, mock_get):
         mock_response = Mock()
         mock_response.raise_for_status = Mock(side_effect=Exception("boom!"))
-        mock_requests.get = Mock(return_value=mock_response)
+        mock_get.return_value = mock_response
         uri = "bogus/uri"
         player_supplier = get_rest_data_source(uri)
 
@@ -48,6 +48,19 @@ class TestParsePlayersJson(unittest.TestCase):
         players = parse_players_json(players_json)
         self.assertEqual(1, len(players))
 
+    def test_parse_players_by_id(self):
+        player_dicts = [_get_player_dict('id1', 'first1', 'last1', 1, 2, 3),
+                        _get_player_dict('id2', 'first2', 'last2', 4, 5, 6)]
+        players_by_id = parse_players_json_by_id(json.dumps(_get_players_dict(player_dicts)))
+        self.assertEqual(['id1', 'id2'], list(players_by_id.keys()))
+        self.assertEqual('first2', players_by_id['id2'].first_name)
+
+    def test_players_to_json_round_trip(self):
+        players = generate_players(5)
+        parsed = parse_players_json(players_to_json(players))
+        self.assertEqual([(p.first_name, p.last_name, p.skating, p.shooting, p.checking) for p in players],
+                         [(p.first_name, p.last_name, p.skating, p.shooting, p.checking) for p in parsed])
+
     def test_parse_mixed_format_ratings(self):
         player_dict = _get_player_dict('id', 'firstName', 'lastName', 33.5, 6, "23")
         players_json = json.dumps(_get_players_dict([player_dict]))
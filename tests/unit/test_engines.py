@@ -0,0 +1,90 @@
+# Copyright 2018 Rhyan Arthur
+
+import json
+import time
+import unittest
+from unittest.mock import patch
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.engines import get_engine, select_engine, run_engine, DEFAULT_ENGINE
+from squad_maker_app.algorithms import make_squads_snake_draft, DeadlineExceeded
+from squad_maker_app.log_queue import stop_queue_logging
+from squad_maker_app.web import PLAYER_SOURCE_CONFIG, LOG_FILE_CONFIG
+
+from app_helpers import create_test_app
+
+
+class TestSelectEngine(unittest.TestCase):
+
+    RULES = [
+        {'engine': 'delta-mean', 'max_players': 100, 'max_squads': 10},
+        {'engine': 'random', 'max_players': 100},
+        {'engine': 'snake-draft'}
+    ]
+
+    def test_first_matching_rule(self):
+        self.assertEqual('delta-mean', select_engine(self.RULES, num_players=100, num_squads=10))
+        self.assertEqual('random', select_engine(self.RULES, num_players=100, num_squads=11))
+        self.assertEqual('snake-draft', select_engine(self.RULES, num_players=101, num_squads=2))
+
+    def test_default_engine(self):
+        self.assertEqual(DEFAULT_ENGINE, select_engine(None, num_players=10, num_squads=2))
+        self.assertEqual('random', select_engine([{'engine': 'snake-draft', 'max_players': 5}], 10, 2,
+                                                 default='random'))
+
+    def test_unknown_engine(self):
+        with self.assertRaisesRegex(Exception, 'bogus'):
+            get_engine('bogus')
+
+
+class TestRunEngine(unittest.TestCase):
+
+    def test_run_without_deadline(self):
+        (squads, waiting_list, engine) = run_engine('delta-mean', 3, generate_players(10))
+        self.assertEqual('delta-mean', engine)
+        self.assertEqual(3, len(squads))
+        self.assertEqual(1, len(waiting_list))
+
+    def test_fallback_when_deadline_missed(self):
+        (squads, waiting_list, engine) = run_engine('delta-mean', 4, generate_players(40),
+                                                    deadline=time.monotonic() - 1, fallback='snake-draft')
+        self.assertEqual('snake-draft', engine)
+        self.assertEqual(4, len(squads))
+
+    def test_missed_deadline_without_fallback(self):
+        with self.assertRaises(DeadlineExceeded):
+            run_engine('delta-mean', 4, generate_players(40), deadline=time.monotonic() - 1)
+
+    def test_deadline_ignored_by_engines_without_deadline_support(self):
+        self.assertIs(make_squads_snake_draft, get_engine('snake-draft'))
+        (squads, waiting_list, engine) = run_engine('snake-draft', 4, generate_players(40),
+                                                    deadline=time.monotonic() - 1)
+        self.assertEqual('snake-draft', engine)
+
+
+class TestEngineLogging(unittest.TestCase):
+
+    def setUp(self):
+        players = generate_players(40)
+        self.app = create_test_app(self, PRECOMPUTE_SQUAD_COUNTS=0)
+        self.app.config[PLAYER_SOURCE_CONFIG] = lambda: list(players)
+
+    def get_served_engines(self, url):
+        def missed_deadline(name, num_squads, players, deadline=None, fallback=None):
+            return run_engine(fallback, num_squads, players)
+
+        with patch('squad_maker_app.web.run_engine', side_effect=missed_deadline):
+            self.assertEqual(200, self.app.test_client().get(url).status_code)
+        stop_queue_logging(self.app.logger)
+        with open(self.app.config[LOG_FILE_CONFIG]) as f:
+            records = [json.loads(line) for line in f]
+        return [r['engine'] for r in records if r['message'].startswith("Served")]
+
+    def test_fallback_engine_logged(self):
+        self.assertEqual(['snake-draft'], self.get_served_engines('/squad-maker?numSquads=4'))
+
+    def test_fallback_engine_logged_for_export(self):
+        self.assertEqual(['snake-draft'], self.get_served_engines('/export/squads.csv?numSquads=4'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright 2018 Rhyan Arthur
+
+import csv
+import io
+import json
+import unittest
+
+from squad_maker_app.web import PLAYER_SOURCE_CONFIG
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.export import iter_rows, iter_csv, iter_ndjson, COLUMNS
+from squad_maker_app.models import Player, Squad
+
+from app_helpers import create_test_app
+
+
+class TestExportRows(unittest.TestCase):
+
+    def setUp(self):
+        self.squads = [Squad([Player('a', 'A', 10, 20, 30), Player('b', 'B', 30, 40, 50)]),
+                       Squad([Player('c', 'C', 1, 2, 3)])]
+        self.waiting_list = [Player('d', 'D', 5, 5, 5)]
+
+    def test_rows(self):
+        rows = list(iter_rows(self.squads, self.waiting_list))
+        self.assertEqual(4, len(rows))
+        self.assertEqual([1, 1, 2, None], [r['squad'] for r in rows])
+        self.assertEqual(20, rows[0]['squadSkatingAverage'])
+        self.assertEqual(30, rows[1]['squadShootingAverage'])
+        self.assertEqual(3, rows[2]['squadCheckingAverage'])
+        self.assertIsNone(rows[3]['squadSkatingAverage'])
+        self.assertEqual('d', rows[3]['firstName'])
+
+    def test_csv_one_line_per_chunk(self):
+        chunks = list(iter_csv(self.squads, self.waiting_list))
+        self.assertEqual(5, len(chunks))
+        self.assertEqual(','.join(COLUMNS), chunks[0].strip())
+        rows = list(csv.DictReader(io.StringIO(''.join(chunks))))
+        self.assertEqual(['a', 'b', 'c', 'd'], [r['firstName'] for r in rows])
+        self.assertEqual('', rows[3]['squad'])
+
+    def test_ndjson(self):
+        lines = list(iter_ndjson(self.squads, self.waiting_list))
+        self.assertEqual(4, len(lines))
+        self.assertEqual('c', json.loads(lines[2])['firstName'])
+        self.assertIsNone(json.loads(lines[3])['squad'])
+
+
+class TestExportEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.players = generate_players(22)
+        self.app = create_test_app(self)
+        self.app.config[PLAYER_SOURCE_CONFIG] = lambda: list(self.players)
+        self.client = self.app.test_client()
+
+    def test_export_csv(self):
+        response = self.client.get('/export/squads.csv?numSquads=4')
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.is_streamed)
+        self.assertTrue(response.mimetype.startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(22, len(rows))
+        self.assertEqual(2, len([r for r in rows if r['squad'] == '']))
+
+    def test_export_ndjson(self):
+        response = self.client.get('/export/squads.ndjson?numSquads=5')
+        self.assertEqual(200, response.status_code)
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual({1, 2, 3, 4, 5, None}, set(r['squad'] for r in rows))
+
+    def test_export_invalid_arguments(self):
+        response = self.client.get('/export/squads.csv?numSquads=50')
+        self.assertEqual(400, response.status_code)
+        self.assertIn(b'not enough players', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
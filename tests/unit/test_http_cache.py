@@ -0,0 +1,111 @@
+# Copyright 2018 Rhyan Arthur
+
+import gzip
+import unittest
+from unittest.mock import patch
+from werkzeug.datastructures import Accept
+
+from squad_maker_app.web import PLAYER_SOURCE_CONFIG
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.http_cache import roster_fingerprint, make_etag, choose_encoding, compress, ResponseCache, \
+    GZIP, BROTLI
+from squad_maker_app.models import Player
+
+from app_helpers import create_test_app
+
+
+class TestHttpCacheUtilities(unittest.TestCase):
+
+    def test_roster_fingerprint(self):
+        players = generate_players(5)
+        self.assertEqual(roster_fingerprint(players), roster_fingerprint(list(players)))
+        self.assertNotEqual(roster_fingerprint(players), roster_fingerprint(list(reversed(players))))
+        changed = players[:4] + [Player(players[4].first_name, players[4].last_name, 1, 2, 3)]
+        self.assertNotEqual(roster_fingerprint(players), roster_fingerprint(changed))
+
+    def test_make_etag(self):
+        self.assertEqual(make_etag(['squads', 'abc', 4]), make_etag(['squads', 'abc', 4]))
+        self.assertNotEqual(make_etag(['squads', 'abc', 4]), make_etag(['squads', 'abc', 5]))
+        self.assertNotEqual(make_etag(['squads', 'abc', 4]), make_etag(['squads', 'abc', 4], GZIP))
+
+    def test_choose_encoding(self):
+        self.assertEqual(GZIP, choose_encoding(Accept([('gzip', 1), ('deflate', 1)])))
+        self.assertIsNone(choose_encoding(Accept([('deflate', 1)])))
+        self.assertIsNone(choose_encoding(Accept([])))
+        with patch('squad_maker_app.http_cache.brotli', object()):
+            self.assertEqual(BROTLI, choose_encoding(Accept([('gzip', 1), ('br', 1)])))
+        with patch('squad_maker_app.http_cache.brotli', None):
+            self.assertEqual(GZIP, choose_encoding(Accept([('gzip', 1), ('br', 1)])))
+
+    def test_compress(self):
+        self.assertEqual(b'body', gzip.decompress(compress(b'body', GZIP)))
+        with self.assertRaises(ValueError):
+            compress(b'body', 'bogus')
+
+    def test_response_cache_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+
+
+class TestConditionalResponses(unittest.TestCase):
+
+    def setUp(self):
+        self.players = generate_players(40)
+        self.app = create_test_app(self)
+        self.app.config[PLAYER_SOURCE_CONFIG] = lambda: list(self.players)
+        self.client = self.app.test_client()
+
+    def test_squads_not_modified(self):
+        response = self.client.get('/squad-maker?numSquads=4')
+        self.assertEqual(200, response.status_code)
+        etag = response.headers['ETag']
+        response = self.client.get('/squad-maker?numSquads=4', headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response.headers['ETag'])
+        self.assertEqual(b'', response.data)
+
+    def test_squads_not_recomputed_for_repeat_polls(self):
+        first = self.client.get('/squad-maker?numSquads=4')
+        with patch('squad_maker_app.web.run_engine') as mock_run_engine:
+            second = self.client.get('/squad-maker?numSquads=4')
+            mock_run_engine.assert_not_called()
+        self.assertEqual(first.data, second.data)
+
+    def test_etag_changes_with_squads_and_roster(self):
+        etag = self.client.get('/squad-maker?numSquads=4').headers['ETag']
+        self.assertNotEqual(etag, self.client.get('/squad-maker?numSquads=5').headers['ETag'])
+        self.players.pop()
+        response = self.client.get('/squad-maker?numSquads=4', headers={'If-None-Match': etag})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def test_home_not_modified(self):
+        etag = self.client.get('/').headers['ETag']
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status_code)
+
+    def test_home_with_error_message_not_cached(self):
+        response = self.client.get('/squad-maker?numSquads=0')
+        self.assertEqual(302, response.status_code)
+        response = self.client.get('/')
+        self.assertIn(b'You must build at least one squad', response.data)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_gzip_response(self):
+        response = self.client.get('/squad-maker?numSquads=4', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        plain = self.client.get('/squad-maker?numSquads=4')
+        self.assertEqual(plain.data, gzip.decompress(response.data))
+        self.assertNotEqual(plain.headers['ETag'], response.headers['ETag'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright 2018 Rhyan Arthur
+
+import json
+import logging
+import threading
+import unittest
+from logging.handlers import QueueHandler
+from unittest.mock import patch
+
+from squad_maker_app.log_queue import StructuredFormatter, start_queue_logging, stop_queue_logging, timed
+from squad_maker_app.web import LOG_FILE_CONFIG
+
+from app_helpers import create_test_app
+
+
+class RecordingHandler(logging.Handler):
+    """ Records each formatted message together with the name of the thread that formatted it. """
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((self.format(record), threading.current_thread().name))
+
+
+class TestStructuredFormatter(unittest.TestCase):
+
+    def test_format_structured_fields(self):
+        record = logging.LogRecord('app', logging.INFO, __file__, 1, "Built %d squads", (4,), None)
+        record.roster_size = 40
+        record.timings = {'assign': 0.5}
+        entry = json.loads(StructuredFormatter().format(record))
+        self.assertEqual("Built 4 squads", entry['message'])
+        self.assertEqual('INFO', entry['level'])
+        self.assertEqual(40, entry['roster_size'])
+        self.assertEqual({'assign': 0.5}, entry['timings'])
+        self.assertNotIn('num_squads', entry)
+
+
+class TestQueueLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('test_log_queue')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        stop_queue_logging(self.logger)
+
+    def test_records_written_on_background_thread(self):
+        handler = RecordingHandler()
+        start_queue_logging(self.logger, handler)
+        self.logger.info("Sourced data for %d players", 12)
+        stop_queue_logging(self.logger)
+        self.assertEqual(1, len(handler.messages))
+        (message, thread_name) = handler.messages[0]
+        self.assertEqual("Sourced data for 12 players", message)
+        self.assertNotEqual(threading.current_thread().name, thread_name)
+
+    def test_restart_replaces_previous_pipeline(self):
+        first = RecordingHandler()
+        second = RecordingHandler()
+        start_queue_logging(self.logger, first)
+        start_queue_logging(self.logger, second)
+        self.assertEqual(1, len([h for h in self.logger.handlers if hasattr(h, 'listener')]))
+        self.logger.info("message")
+        stop_queue_logging(self.logger)
+        self.assertEqual(0, len(first.messages))
+        self.assertEqual(1, len(second.messages))
+
+
+class TestAppLogging(unittest.TestCase):
+
+    def test_app_logger_only_queues_records(self):
+        # Flask only adds its default handler when no handler would otherwise see the app's records, which under
+        # a test runner capturing logs is never the case
+        with patch('flask.logging.has_level_handler', return_value=False):
+            app = create_test_app(self)
+        # every handler on the app's logger must hand records to the background thread, rather than write them
+        self.assertTrue(app.logger.handlers)
+        for handler in app.logger.handlers:
+            self.assertIsInstance(handler, QueueHandler)
+        app.logger.info("Sourced data for %d players", 12)
+        stop_queue_logging(app.logger)
+        with open(app.config[LOG_FILE_CONFIG]) as f:
+            self.assertEqual("Sourced data for 12 players", json.loads(f.readline())['message'])
+
+
+class TestTimed(unittest.TestCase):
+
+    def test_records_duration(self):
+        timings = {}
+        with timed(timings, 'stage'):
+            pass
+        self.assertGreaterEqual(timings['stage'], 0)
+
+    def test_records_duration_on_error(self):
+        timings = {}
+        with self.assertRaises(ValueError):
+            with timed(timings, 'stage'):
+                raise ValueError()
+        self.assertIn('stage', timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
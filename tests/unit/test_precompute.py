@@ -0,0 +1,151 @@
+# Copyright 2018 Rhyan Arthur
+
+import json
+import unittest
+from unittest.mock import patch
+
+from squad_maker_app.web import PLAYER_SOURCE_CONFIG, PRECOMPUTER_EXTENSION
+from squad_maker_app.algorithms import make_squads_minimize_cumulative_delta_mean
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.engines import run_engine
+from squad_maker_app.precompute import SquadPrecomputer, MAX_TRACKED_COUNTS
+
+from app_helpers import create_test_app
+
+
+class CountingMaker:
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, players, num_squads):
+        self.calls.append(num_squads)
+        return make_squads_minimize_cumulative_delta_mean(num_squads, players)
+
+
+class TestSquadPrecomputer(unittest.TestCase):
+
+    def setUp(self):
+        self.maker = CountingMaker()
+        self.precomputer = SquadPrecomputer(self.maker, top_counts=2)
+        self.players = generate_players(20)
+
+    def test_precomputes_most_popular_counts(self):
+        for num_squads in [4, 4, 4, 5, 5, 2]:
+            self.precomputer.record_request(num_squads)
+        self.precomputer.roster_seen('roster', self.players)
+        self.precomputer.wait()
+        self.assertEqual([4, 5], self.maker.calls)
+        (squads, waiting_list) = self.precomputer.get('roster', 4)
+        self.assertEqual(4, len(squads))
+        self.assertIsNotNone(self.precomputer.get('roster', 5))
+        self.assertIsNone(self.precomputer.get('roster', 2))
+        stats = self.precomputer.stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(2, stats['precomputed'])
+        self.assertAlmostEqual(2 / 3, stats['hit_rate'])
+
+    def test_only_precomputes_when_roster_changes(self):
+        self.precomputer.record_request(4)
+        self.precomputer.roster_seen('roster', self.players)
+        self.precomputer.wait()
+        self.precomputer.roster_seen('roster', self.players)
+        self.precomputer.wait()
+        self.assertEqual([4], self.maker.calls)
+        self.precomputer.roster_seen('new roster', self.players)
+        self.precomputer.wait()
+        self.assertEqual([4, 4], self.maker.calls)
+        # results for the old roster are discarded
+        self.assertIsNone(self.precomputer.get('roster', 4))
+        self.assertIsNotNone(self.precomputer.get('new roster', 4))
+
+    def test_skips_invalid_counts(self):
+        self.precomputer.record_request(50)
+        self.precomputer.record_request(4)
+        self.precomputer.roster_seen('roster', self.players)
+        self.precomputer.wait()
+        self.assertIsNone(self.precomputer.get('roster', 50))
+        self.assertIsNotNone(self.precomputer.get('roster', 4))
+
+    def test_requested_counts_bounded(self):
+        for num_squads in [4, 4, 0, -1, 30]:
+            self.precomputer.record_request(num_squads, num_players=20)
+        self.assertEqual({4: 2}, self.precomputer.stats()['requested'])
+        for num_squads in range(100, 100 + MAX_TRACKED_COUNTS * 2):
+            self.precomputer.record_request(num_squads)
+        requested = self.precomputer.stats()['requested']
+        self.assertEqual(MAX_TRACKED_COUNTS, len(requested))
+        # the most requested count is kept
+        self.assertEqual(2, requested[4])
+
+    def test_bounded_store(self):
+        precomputer = SquadPrecomputer(self.maker, top_counts=3, max_results=2)
+        for num_squads in [2, 3, 4]:
+            precomputer.record_request(num_squads)
+        precomputer.roster_seen('roster', self.players)
+        precomputer.wait()
+        self.assertEqual(2, precomputer.stats()['stored'])
+
+    def test_put_result_not_precomputed_again(self):
+        self.precomputer.record_request(4)
+        self.precomputer.roster_seen('roster', [])
+        self.precomputer.wait()
+        result = make_squads_minimize_cumulative_delta_mean(4, self.players)
+        self.precomputer.put('roster', 4, result, 0.5)
+        self.assertIs(result, self.precomputer.peek('roster', 4))
+        self.assertEqual(0, self.precomputer.stats()['hits'])
+        self.precomputer.roster_seen('new roster', self.players)
+        self.precomputer.wait()
+        self.precomputer.put('new roster', 4, result, 0.5)
+        self.precomputer.put('roster', 4, result, 0.5)
+        # the precomputed result is kept, and results for old rosters are ignored
+        self.assertIsNot(result, self.precomputer.get('new roster', 4))
+        self.assertIsNone(self.precomputer.peek('roster', 4))
+        self.assertEqual(1, self.precomputer.stats()['precomputed'])
+
+    def test_disabled(self):
+        precomputer = SquadPrecomputer(self.maker, top_counts=0)
+        precomputer.record_request(4)
+        precomputer.roster_seen('roster', self.players)
+        precomputer.wait()
+        self.assertEqual([], self.maker.calls)
+
+
+class TestPrecomputeInApp(unittest.TestCase):
+
+    def setUp(self):
+        self.players = generate_players(40)
+        self.app = create_test_app(self)
+        self.app.config[PLAYER_SOURCE_CONFIG] = lambda: list(self.players)
+        self.client = self.app.test_client()
+
+    def test_request_served_from_precomputed_result(self):
+        self.client.get('/squad-maker?numSquads=4')
+        # a new roster triggers precomputation of the popular squad count
+        self.players = generate_players(40)
+        self.client.get('/')
+        precomputer = self.app.extensions[PRECOMPUTER_EXTENSION]
+        precomputer.wait()
+        hits = precomputer.stats()['hits']
+        with patch('squad_maker_app.web.run_engine') as mock_run_engine:
+            response = self.client.get('/squad-maker?numSquads=4')
+            mock_run_engine.assert_not_called()
+        self.assertEqual(200, response.status_code)
+        stats = json.loads(self.client.get('/stats/precompute').data)
+        self.assertEqual(hits + 1, stats['hits'])
+        self.assertEqual({'4': 2}, stats['requested'])
+
+    def test_roster_change_builds_squads_once(self):
+        self.client.get('/squad-maker?numSquads=4')
+        # the new roster starts a precomputation for 4 squads, and the request shares it rather than making its own
+        self.players = generate_players(40)
+        with patch('squad_maker_app.web.run_engine', wraps=run_engine) as mock_run_engine:
+            response = self.client.get('/squad-maker?numSquads=4')
+            self.app.extensions[PRECOMPUTER_EXTENSION].wait()
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, mock_run_engine.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# Copyright 2018 Rhyan Arthur
+
+import json
+import tracemalloc
+import unittest
+from squad_maker_app.profiling import MemoryProfiler
+
+
+class TestMemoryProfiler(unittest.TestCase):
+
+    def test_records_stages(self):
+        profiler = MemoryProfiler()
+        with profiler.stage('allocate', roster_size=10):
+            data = [list(range(100)) for _ in range(100)]
+        with profiler.stage('nothing'):
+            pass
+        (allocate, nothing) = profiler.stages
+        self.assertEqual('allocate', allocate['stage'])
+        self.assertEqual(10, allocate['roster_size'])
+        self.assertGreater(allocate['peak_bytes'], 100 * 100 * 8)
+        self.assertGreaterEqual(allocate['peak_bytes'], allocate['retained_bytes'])
+        self.assertGreater(allocate['retained_blocks'], 100)
+        self.assertLess(nothing['peak_bytes'], allocate['peak_bytes'])
+        self.assertEqual(100, len(data))
+
+    def test_tracing_stopped_after_stage(self):
+        profiler = MemoryProfiler()
+        with profiler.stage('stage'):
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_disabled(self):
+        profiler = MemoryProfiler(enabled=False)
+        with profiler.stage('stage'):
+            self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual([], profiler.stages)
+
+    def test_to_json(self):
+        profiler = MemoryProfiler()
+        with profiler.stage('stage'):
+            pass
+        profile = json.loads(profiler.to_json())
+        self.assertIn('python', profile)
+        self.assertEqual(['stage'], [s['stage'] for s in profile['stages']])
+
+
+if __name__ == '__main__':
+    unittest.main()
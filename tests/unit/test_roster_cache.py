@@ -0,0 +1,121 @@
+# Copyright 2018 Rhyan Arthur
+
+import fcntl
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from squad_maker_app.data_sources import generate_players
+from squad_maker_app.roster_cache import get_shared_cache_data_source, SharedRosterCache, LOCK_FILE_SUFFIX
+
+NUM_PLAYERS = 12
+NUM_PROCESSES = 4
+
+
+class CountingSource:
+    """ A slow player source that records each call in a file, so calls can be counted across processes. """
+
+    def __init__(self, count_file, delay=0.0):
+        self.count_file = count_file
+        self.delay = delay
+
+    def __call__(self):
+        with open(self.count_file, 'a') as f:
+            f.write('x')
+        time.sleep(self.delay)
+        return generate_players(NUM_PLAYERS)
+
+    @property
+    def calls(self):
+        if not os.path.exists(self.count_file):
+            return 0
+        with open(self.count_file) as f:
+            return len(f.read())
+
+
+def _get_players_in_worker(cache_file, count_file):
+    source = CountingSource(count_file, delay=0.2)
+    players = get_shared_cache_data_source(source, cache_file, max_age=60, max_stale=0)()
+    return [(p.first_name, p.skating, p.shooting, p.checking) for p in players]
+
+
+class TestSharedRosterCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.dir, 'roster.cache')
+        self.source = CountingSource(os.path.join(self.dir, 'calls'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_fresh_roster_is_not_refetched(self):
+        get_players = get_shared_cache_data_source(self.source, self.cache_file, max_age=60)
+        first = get_players()
+        second = get_players()
+        self.assertEqual(1, self.source.calls)
+        self.assertEqual(NUM_PLAYERS, len(second))
+        self.assertEqual([p.first_name for p in first], [p.first_name for p in second])
+
+    def test_returns_copy_of_roster(self):
+        get_players = get_shared_cache_data_source(self.source, self.cache_file)
+        get_players().pop()
+        self.assertEqual(NUM_PLAYERS, len(get_players()))
+
+    def test_cache_shared_between_instances(self):
+        get_shared_cache_data_source(self.source, self.cache_file)()
+        other_source = CountingSource(os.path.join(self.dir, 'other_calls'))
+        players = get_shared_cache_data_source(other_source, self.cache_file)()
+        self.assertEqual(NUM_PLAYERS, len(players))
+        self.assertEqual(0, other_source.calls)
+
+    def test_stale_roster_is_refreshed(self):
+        get_players = get_shared_cache_data_source(self.source, self.cache_file, max_age=0, max_stale=0)
+        get_players()
+        get_players()
+        self.assertEqual(2, self.source.calls)
+
+    def test_stale_roster_served_while_another_process_refreshes(self):
+        get_players = get_shared_cache_data_source(self.source, self.cache_file, max_age=0, max_stale=60)
+        get_players()
+        with open(self.cache_file + LOCK_FILE_SUFFIX, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            players = get_players()
+        self.assertEqual(NUM_PLAYERS, len(players))
+        self.assertEqual(1, self.source.calls)
+
+    def test_waits_for_refresh_beyond_stale_bound(self):
+        get_players = get_shared_cache_data_source(self.source, self.cache_file, max_age=0, max_stale=0)
+        get_players()
+        lock = open(self.cache_file + LOCK_FILE_SUFFIX, 'a')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        release = threading.Timer(0.2, lock.close)
+        release.start()
+        start = time.time()
+        players = get_players()
+        release.join()
+        self.assertGreaterEqual(time.time() - start, 0.2)
+        self.assertEqual(NUM_PLAYERS, len(players))
+        self.assertEqual(2, self.source.calls)
+
+    def test_invalid_staleness_bounds(self):
+        with self.assertRaises(ValueError):
+            SharedRosterCache(self.source, self.cache_file, max_age=-1)
+        with self.assertRaises(ValueError):
+            SharedRosterCache(self.source, self.cache_file, max_stale=-1)
+
+    def test_single_refresh_across_processes(self):
+        with multiprocessing.Pool(NUM_PROCESSES) as pool:
+            rosters = pool.starmap(_get_players_in_worker, [(self.cache_file, self.source.count_file)] * NUM_PROCESSES)
+        self.assertEqual(1, self.source.calls)
+        # every process read the same parsed roster
+        for roster in rosters:
+            self.assertEqual(rosters[0], roster)
+
+
+if __name__ == '__main__':
+    unittest.main()
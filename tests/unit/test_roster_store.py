@@ -0,0 +1,119 @@
+# Copyright 2018 Rhyan Arthur
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from unittest.mock import patch
+
+from squad_maker_app.data_sources import PLAYERS_KEY, SKILLS_KEY, SKILL_TYPE_KEY, SKILL_RATING_KEY, \
+    SKATING_SKILL, SHOOTING_SKILL, CHECKING_SKILL, ID_KEY, FIRST_NAME_KEY, LAST_NAME_KEY
+from squad_maker_app.roster_store import RosterStore, get_roster_store_data_source, sync_roster_store
+
+
+class TestRosterStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'roster.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_empty_store(self):
+        players = get_roster_store_data_source(self.filename)()
+        self.assertEqual([], players)
+
+    def test_sync_new_players(self):
+        (upserted, deleted) = sync_roster_store(self.filename, _get_players_json([
+            _get_player_dict('1', 'Wayne', 'Gretzky', 90, 99, 40),
+            _get_player_dict('2', 'Bobby', 'Orr', 95, 80, 85)
+        ]))
+        self.assertEqual((2, 0), (upserted, deleted))
+        players = get_roster_store_data_source(self.filename)()
+        self.assertEqual(['Wayne', 'Bobby'], [p.first_name for p in players])
+        self.assertEqual(90, players[0].skating)
+        self.assertEqual(99, players[0].shooting)
+        self.assertEqual(40, players[0].checking)
+
+    def test_incremental_sync(self):
+        sync_roster_store(self.filename, _get_players_json([
+            _get_player_dict('1', 'Wayne', 'Gretzky', 90, 99, 40),
+            _get_player_dict('2', 'Bobby', 'Orr', 95, 80, 85),
+            _get_player_dict('3', 'Mario', 'Lemieux', 92, 97, 60)
+        ]))
+        (upserted, deleted) = sync_roster_store(self.filename, _get_players_json([
+            _get_player_dict('1', 'Wayne', 'Gretzky', 90, 99, 40),
+            _get_player_dict('2', 'Bobby', 'Orr', 95, 80, 90),
+            _get_player_dict('4', 'Gordie', 'Howe', 85, 88, 95)
+        ]))
+        # Orr changed, Howe was added, and Lemieux was removed. Gretzky is untouched.
+        self.assertEqual((2, 1), (upserted, deleted))
+        players = get_roster_store_data_source(self.filename)()
+        self.assertEqual(['Wayne', 'Bobby', 'Gordie'], [p.first_name for p in players])
+        self.assertEqual(90, players[1].checking)
+
+    def test_unchanged_sync_writes_nothing(self):
+        json_str = _get_players_json([_get_player_dict('1', 'Wayne', 'Gretzky', 90, 99, 40)])
+        sync_roster_store(self.filename, json_str)
+        self.assertEqual((0, 0), sync_roster_store(self.filename, json_str))
+
+    def test_min_rating(self):
+        sync_roster_store(self.filename, _get_players_json([
+            _get_player_dict('1', 'Low', 'Rated', 10, 10, 10),
+            _get_player_dict('2', 'High', 'Rated', 90, 90, 90),
+            _get_player_dict('3', 'Exactly', 'Rated', 50, 50, 50)
+        ]))
+        players = get_roster_store_data_source(self.filename, min_rating=150)()
+        self.assertEqual(['High', 'Exactly'], [p.first_name for p in players])
+
+    def test_read_only_store(self):
+        sync_roster_store(self.filename, _get_players_json([_get_player_dict('1', 'Wayne', 'Gretzky', 90, 99, 40)]))
+        with closing(RosterStore(self.filename, read_only=True)) as store:
+            self.assertEqual(['Wayne'], [p.first_name for p in store.get_players()])
+            with self.assertRaises(sqlite3.OperationalError):
+                store.connection.execute("DELETE FROM players")
+
+    def test_data_source_reuses_read_only_connection(self):
+        source = get_roster_store_data_source(self.filename)
+        with patch('squad_maker_app.roster_store.RosterStore', wraps=RosterStore) as mock_store:
+            source()
+            source()
+        # a single read-only connection is opened, and the schema isn't created again
+        mock_store.assert_called_once_with(self.filename, read_only=True)
+
+    def test_data_source_sees_later_syncs(self):
+        source = get_roster_store_data_source(self.filename)
+        self.assertEqual([], source())
+        sync_roster_store(self.filename, _get_players_json([_get_player_dict('1', 'Wayne', 'Gretzky', 90, 99, 40)]))
+        self.assertEqual(['Wayne'], [p.first_name for p in source()])
+
+    def test_total_rating_index_used(self):
+        with closing(RosterStore(self.filename)) as store:
+            plan = store.connection.execute("EXPLAIN QUERY PLAN SELECT first_name FROM players "
+                                            "WHERE total_rating >= 100").fetchall()
+        self.assertIn('players_total_rating', ' '.join(str(row) for row in plan))
+
+
+def _get_players_json(player_dicts):
+    return json.dumps({PLAYERS_KEY: player_dicts})
+
+
+def _get_player_dict(id, first_name, last_name, skating, shooting, checking):
+    return {
+        ID_KEY: id,
+        FIRST_NAME_KEY: first_name,
+        LAST_NAME_KEY: last_name,
+        SKILLS_KEY: [
+            {SKILL_TYPE_KEY: SKATING_SKILL, SKILL_RATING_KEY: skating},
+            {SKILL_TYPE_KEY: SHOOTING_SKILL, SKILL_RATING_KEY: shooting},
+            {SKILL_TYPE_KEY: CHECKING_SKILL, SKILL_RATING_KEY: checking}
+        ]
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()